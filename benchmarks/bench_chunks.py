@@ -0,0 +1,112 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Measures how ContainerParser resolves the ends of chunks without a size table
+# (ContainerParser._resolve_chunk_ends) as the offset table grows. bench_parser.py
+# doesn't cover it, since the containers of synthetic models have a fixed number
+# of chunk slots. Each container here has N chunk slots laid out as follows:
+#
+#   ordered   offsets increase, every slot has a chunk
+#   sparse    three of four slots are empty, i.e., their offsets are 0
+#   shuffled  offsets are in random order, and half of the slots are empty
+#
+# Each row has the time of a call and the growth of the time per slot since the
+# first N. A growth above --threshold means that resolving is superlinear, and
+# it's marked with "!". The ends are also checked against a forward scan from
+# every offset for the smallest N.
+#
+# Usage: python benchmarks/bench_chunks.py [--sizes 1024 4096 ...] [--json PATH]
+
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'ninja_gaiden_tmc'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tcmlib.parser import ContainerParser
+from synthetic import header, pad
+
+import argparse
+import json
+import random
+import struct
+import timeit
+
+CHUNK_NBYTES = 16
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(prog='bench_chunks.py')
+    p.add_argument('--sizes', type=int, nargs='+', default=[1 << 10, 1 << 12, 1 << 14, 1 << 16, 1 << 18])
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--threshold', type=float, default=2.)
+    p.add_argument('--json')
+    return p.parse_args(argv)
+
+# It returns the container with the offsets of its chunk slots by layout.
+def build_container(n, layout, seed = 0):
+    present = [ (layout == 'ordered') or (layout == 'sparse' and i % 4 == 0) or
+                (layout == 'shuffled' and i % 2 == 0) for i in range(n) ]
+    offset_table_pos = 0x30
+    o = offset_table_pos + len(pad(4*n*b'.'))
+    O = []
+    for x in present:
+        O.append(x and o)
+        o += x and CHUNK_NBYTES
+    if layout == 'shuffled':
+        random.Random(seed).shuffle(O)
+    chunks = [ (x and CHUNK_NBYTES*b'.') or b'' for x in present ]
+    h = header(b'BENCH', 1, 0x30, o, chunks, offset_table_pos, 0, 0)
+    data = pad(h) + pad(struct.pack(f'< {n}I', *O)) + b''.join(chunks)
+    return data, O
+
+# The ends of chunks by scanning forward from every offset, which is what the single
+# backward pass replaced.
+def forward_chunk_ends(offset_table, end):
+    E = []
+    for i, o in enumerate(offset_table):
+        if not o:
+            E.append(0)
+            continue
+        E.append(next(( p for p in offset_table[i+1:] if p ), end))
+    return E
+
+def operations(data, offsets):
+    def resolve():
+        ContainerParser._resolve_chunk_ends(offsets, len(data))
+
+    def container():
+        ContainerParser(b'BENCH', data).close()
+
+    return { 'resolve': resolve, 'container': container }
+
+def time_call(f, repeat):
+    t = timeit.Timer(f)
+    n, _ = t.autorange()
+    return min(t.repeat(repeat, n)) / n
+
+def main(argv):
+    args = parse_args(argv)
+    R = []
+    for layout in ('ordered', 'sparse', 'shuffled'):
+        first = {}
+        for k, n in enumerate(args.sizes):
+            data, offsets = build_container(n, layout)
+            if k == 0:
+                E = ContainerParser._resolve_chunk_ends(offsets, len(data))
+                if E != forward_chunk_ends(offsets, len(data)):
+                    print(f'{layout}: chunk ends differ from a forward scan')
+                    return 1
+            for name, f in operations(data, offsets).items():
+                t = time_call(f, args.repeat)
+                per_slot = t / n
+                growth = per_slot / first.setdefault(name, per_slot)
+                R.append({ 'layout': layout, 'slots': n, 'op': name, 'seconds': t, 'growth': growth })
+                mark = (growth > args.threshold and '!') or ' '
+                print(f'{layout:<9} {n:8} {name:<9} {1e6*t:12.1f} us {1e9*per_slot:8.1f} ns/slot '
+                      f'growth {growth:5.2f}{mark}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({ 'results': R }, f, indent=1)
+    # The exit status tells whether resolving is superlinear.
+    return int(any( x['growth'] > args.threshold for x in R ))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else sys.argv[1:]))
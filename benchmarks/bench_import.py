@@ -0,0 +1,182 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Imports synthetic models of increasing scale (see benchmarks/synthetic.py), and
+# optionally real ones, in Blender and writes a baseline with the seconds of each
+# phase of the import (see tcmlib.instrument), objects, vertices and materials per
+# second and the size of the saved .blend. compare tells which models got slower
+# or bigger than in another baseline, which doesn't need Blender.
+#
+# Usage:
+#   blender -b --factory-startup -P benchmarks/bench_import.py -- run -o BASELINE
+#           [--game ngs1|ngs2] [--scales 1 2 4 ...] [--tmc PATH ...] [--repeat N]
+#           [--decode-processes N] [--decode-textures]
+#   python benchmarks/bench_import.py compare BASELINE CURRENT [--threshold 0.1]
+#
+# The exit status of compare is 1 if anything regressed.
+
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tomllib
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(prog='bench_import.py')
+    sp = p.add_subparsers(dest='command', required=True)
+
+    x = sp.add_parser('run', help='Import models in Blender and write a baseline')
+    x.add_argument('-o', '--output', required=True)
+    x.add_argument('--game', choices=('ngs1', 'ngs2'), action='append')
+    x.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4, 8])
+    # Real models, whose companions are found as by import_file
+    x.add_argument('--tmc', action='append', default=[])
+    x.add_argument('--repeat', type=int, default=3)
+    x.add_argument('--decode-processes', type=int, default=1)
+    x.add_argument('--decode-textures', action='store_true')
+    # Memory is traced for the peaks of phases, which slows the import down.
+    x.add_argument('--memory', action='store_true')
+
+    x = sp.add_parser('compare', help='Compare a baseline with another')
+    x.add_argument('baseline')
+    x.add_argument('current')
+    # Relative growth which is a regression
+    x.add_argument('--threshold', type=float, default=.1)
+    # Smaller differences of seconds are noise.
+    x.add_argument('--min-seconds', type=float, default=.005)
+    return p.parse_args(argv)
+
+def addon_version():
+    p = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'ninja_gaiden_tmc', 'blender_manifest.toml')
+    with open(p, 'rb') as f:
+        return tomllib.load(f)['version']
+
+# It imports a model into an empty file, and returns the result of the fastest of
+# repeat imports.
+def measure(args, name, tmc, tmcl = None, g1tg = None):
+    import bpy
+    from ninja_gaiden_tmc import import_file
+    from ninja_gaiden_tmc.tcmlib.instrument import Profiler
+
+    best = None
+    for _ in range(args.repeat):
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        t = time.perf_counter()
+        with Profiler(memory=args.memory) as p:
+            import_file(tmc, tmcl, g1tg, decode_textures=args.decode_textures,
+                        decode_processes=args.decode_processes)
+        t = time.perf_counter() - t
+        if best and best['import_s'] <= t:
+            continue
+        with tempfile.TemporaryDirectory() as d:
+            s = time.perf_counter()
+            blend = os.path.join(d, 'model.blend')
+            bpy.ops.wm.save_as_mainfile(filepath=blend, copy=True)
+            s = time.perf_counter() - s
+            blend_bytes = os.path.getsize(blend)
+        objects = len(bpy.data.objects)
+        vertices = sum( len(m.vertices) for m in bpy.data.meshes )
+        materials = len(bpy.data.materials)
+        best = {
+                'model': name,
+                'import_s': t,
+                'save_s': s,
+                'blend_bytes': blend_bytes,
+                'objects': objects,
+                'vertices': vertices,
+                'materials': materials,
+                'objects_per_s': objects / t,
+                'vertices_per_s': vertices / t,
+                'materials_per_s': materials / t,
+                'phases': p.summary()['phases'],
+        }
+    return best
+
+def run(args):
+    import bpy
+    from synthetic import Scale, write_model
+
+    R = []
+    with tempfile.TemporaryDirectory() as d:
+        for game in args.game or ('ngs1', 'ngs2'):
+            for k in args.scales:
+                name = f'{game}x{k}'
+                P = write_model(d, name, game, Scale().scaled(k))
+                R.append(measure(args, name, P['.tmc'], P['.tmcl'], P.get('.g1t')))
+                print_result(R[-1])
+    for tmc in args.tmc:
+        R.append(measure(args, os.path.basename(tmc), tmc))
+        print_result(R[-1])
+
+    baseline = {
+            'blender': bpy.app.version_string,
+            'addon': addon_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'options': { 'repeat': args.repeat, 'decode_processes': args.decode_processes,
+                         'decode_textures': args.decode_textures, 'memory': args.memory },
+            'results': R,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(baseline, f, indent=1)
+    print(f'Baseline is written to {args.output}')
+
+def print_result(x):
+    print(f"{x['model']:<12} {x['import_s']:8.3f} s  {x['objects_per_s']:8.1f} objects/s "
+          f"{x['vertices_per_s']:12.0f} verts/s {x['materials_per_s']:8.1f} materials/s "
+          f"{x['blend_bytes']/2**20:8.1f} MiB")
+    for k, s in sorted(x['phases'].items(), key=lambda x: -x[1]['wall_s'])[:5]:
+        print(f"    {k:<18} {s['wall_s']:8.3f} s in {s['calls']} calls")
+
+# It returns (metric, baseline, current, regressed) of the models in both baselines.
+def compare_results(baseline, current, threshold, min_seconds):
+    B = { x['model']: x for x in baseline['results'] }
+    R = []
+    for c in current['results']:
+        b = B.get(c['model'])
+        if not b:
+            continue
+        M = [ ('import_s', b['import_s'], c['import_s'], True),
+              ('save_s', b['save_s'], c['save_s'], True),
+              ('blend_bytes', b['blend_bytes'], c['blend_bytes'], False) ]
+        M += [ (f'phase {k}', b['phases'][k]['wall_s'], s['wall_s'], True)
+               for k, s in c['phases'].items() if k in b['phases'] ]
+        for name, x, y, seconds in M:
+            regressed = y > x * (1 + threshold) and (not seconds or y - x > min_seconds)
+            R.append((c['model'], name, x, y, regressed))
+    return R
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    print(f"Blender {baseline['blender']} -> {current['blender']}, "
+          f"add-on {baseline['addon']} -> {current['addon']}")
+    R = compare_results(baseline, current, args.threshold, args.min_seconds)
+    for model, name, x, y, regressed in R:
+        r = (x and f'{y/x:6.2f}x') or '      -'
+        print(f"{(regressed and '!') or ' '} {model:<12} {name:<24} {x:14.4f} {y:14.4f} {r}")
+    missing = { x['model'] for x in baseline['results'] } - { x['model'] for x in current['results'] }
+    for m in sorted(missing):
+        print(f'  {m} is not in {args.current}')
+    n = sum( 1 for x in R if x[-1] )
+    print(f'{n} regressions beyond {100*args.threshold:.0f}%')
+    return int(n > 0)
+
+def main(argv):
+    args = parse_args(argv)
+    if args.command == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else sys.argv[1:]))
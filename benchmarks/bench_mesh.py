@@ -0,0 +1,63 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Compares building a mesh with per-element bmesh calls, as import_tmc used to,
+# against the foreach_set path in ninja_gaiden_tmc.mesh.
+#
+# Usage: blender -b --factory-startup -P benchmarks/bench_mesh.py -- [grid_size ...]
+
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ninja_gaiden_tmc.mesh import set_geometry
+from ninja_gaiden_tmc.tcmlib.topology import unique_triangles
+import bpy
+import bmesh
+import numpy as np
+
+import time
+
+def make_grid(n):
+    y, x = np.mgrid[0:n, 0:n].astype(np.float32)
+    positions = np.column_stack((x.ravel(), y.ravel(), np.zeros(n*n, np.float32)))
+    i = np.arange(n*n).reshape(n, n)[:-1, :-1].ravel()
+    triangles = np.concatenate((np.column_stack((i, i+1, i+n)), np.column_stack((i+1, i+n+1, i+n))))
+    # Every tenth triangle is repeated so that duplicate filtering is exercised.
+    triangles = np.concatenate((triangles, triangles[::10]))
+    material_indices = np.arange(len(triangles)) % 4
+    return positions, triangles, material_indices
+
+def build_bmesh(positions, triangles, material_indices):
+    m = bpy.data.meshes.new('bmesh')
+    bm = bmesh.new(use_operators=False)
+    BV = [ bm.verts.new(p) for p in positions.tolist() ]
+    for f, i in zip(triangles.tolist(), material_indices.tolist()):
+        try:
+            bm.faces.new( BV[j] for j in f ).material_index = i
+        except ValueError:
+            pass
+    bm.to_mesh(m)
+    bm.free()
+    return m
+
+def build_bulk(positions, triangles, material_indices):
+    # import_tmc filters duplicates before building the mesh.
+    I = unique_triangles(triangles)
+    m = bpy.data.meshes.new('bulk')
+    set_geometry(m, positions, triangles[I], material_indices[I])
+    return m
+
+def main(argv):
+    for n in map(int, argv or ('100', '300', '700')):
+        X = make_grid(n)
+        R = []
+        for f in (build_bmesh, build_bulk):
+            t = time.perf_counter()
+            m = f(*X)
+            R.append(time.perf_counter() - t)
+            v, p = len(m.vertices), len(m.polygons)
+            bpy.data.meshes.remove(m)
+        print(f'{v:>9} verts {p:>9} faces  bmesh {R[0]:8.3f}s  bulk {R[1]:8.3f}s  x{R[0]/R[1]:.1f}')
+
+if __name__ == '__main__':
+    main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else [])
@@ -0,0 +1,52 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Compares setting custom normals from a tuple of per-vertex Vectors, as import_tmc
+# used to, against passing the decoded array to ninja_gaiden_tmc.mesh.set_custom_normals.
+#
+# Usage: blender -b --factory-startup -P benchmarks/bench_normals.py -- [vertex_count]
+
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ninja_gaiden_tmc.mesh import set_geometry, set_custom_normals, rotate_yup_to_zup
+import bpy
+from mathutils import Vector
+import numpy as np
+
+import time
+import tracemalloc
+
+def make_mesh(vertex_count):
+    n = int(vertex_count ** .5)
+    y, x = np.mgrid[0:n, 0:n].astype(np.float32)
+    positions = np.column_stack((x.ravel(), y.ravel(), np.zeros(n*n, np.float32)))
+    i = np.arange(n*n).reshape(n, n)[:-1, :-1].ravel()
+    triangles = np.concatenate((np.column_stack((i, i+1, i+n)), np.column_stack((i+1, i+n+1, i+n))))
+    m = bpy.data.meshes.new('normals')
+    set_geometry(m, positions, triangles, np.zeros(len(triangles), np.int32))
+    normals = np.random.default_rng(0).normal(size=(n*n, 3)).astype(np.float32)
+    return m, normals / np.linalg.norm(normals, axis=1)[:, None]
+
+def set_vectors(m, normals):
+    V = [ Vector(n) for n in normals.tolist() ]
+    m.normals_split_custom_set_from_vertices(tuple( v for v in V ))
+
+def set_array(m, normals):
+    set_custom_normals(m, rotate_yup_to_zup(normals))
+
+def main(argv):
+    vertex_count = int(argv[0]) if argv else 500_000
+    for f in (set_vectors, set_array):
+        m, normals = make_mesh(vertex_count)
+        tracemalloc.start()
+        t = time.perf_counter()
+        f(m, normals)
+        t = time.perf_counter() - t
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{f.__name__:12} {len(m.vertices):>9} verts {t:8.3f}s  peak {peak / 2**20:8.1f} MiB')
+        bpy.data.meshes.remove(m)
+
+if __name__ == '__main__':
+    main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else [])
@@ -0,0 +1,125 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Measures ContainerParser, TMCParser and G1TGParser over synthetic models of
+# increasing scale, i.e., Scale().scaled(k) of benchmarks/synthetic.py. Each row
+# has the time and the allocations of a call, and the growth of the time per item
+# since the first scale, where items are the objects, bones, textures, materials
+# and variants of the model. A growth above --threshold means that the parser is
+# superlinear, and it's marked with "!".
+#
+#   container  ContainerParser of the whole TMC
+#   open       TMCParser, which only parses the header
+#   parse      TMCParser and every sub-parser the importers use
+#   g1tg       G1TGParser (NGS1)
+#
+# The parsers don't need Blender, so this runs with any Python which has NumPy.
+#
+# Usage: python benchmarks/bench_parser.py [--game ngs1|ngs2] [--scales 1 2 4 ...] [--json PATH]
+
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'ninja_gaiden_tmc'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tcmlib.parser import ContainerParser
+from tcmlib.g1tg import G1TGParser
+from tcmlib import ngs1, ngs2
+from synthetic import Scale, build_model
+
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+
+# Sub-parsers built by parse, which are the ones the importers use.
+SUB_PARSERS = {
+        'ngs1': ('vtxlay', 'idxlay', 'mdlgeo', 'mtrcol', 'hielay', 'obj_type_info', 'extmcol'),
+        'ngs2': ('lheader', 'mdlgeo', 'ttdm', 'vtxlay', 'idxlay', 'mtrcol', 'hielay', 'nodelay',
+                 'glblmtx', 'bnofsmtx', 'obj_type_info', 'mtrlchng'),
+}
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(prog='bench_parser.py')
+    p.add_argument('--game', choices=('ngs1', 'ngs2'), action='append')
+    p.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--threshold', type=float, default=2.)
+    p.add_argument('--json')
+    return p.parse_args(argv)
+
+def operations(game, files):
+    tmc, tmcl = files['.tmc'], files['.tmcl']
+    TMCParser = (game == 'ngs1' and ngs1.TMCParser) or ngs2.TMCParser
+
+    def container():
+        ContainerParser(b'TMC', tmc).close()
+
+    def open_():
+        TMCParser(tmc, tmcl).close()
+
+    def parse():
+        with TMCParser(tmc, tmcl) as p:
+            for k in SUB_PARSERS[game]:
+                getattr(p, k)
+
+    X = { 'container': container, 'open': open_, 'parse': parse }
+    if game == 'ngs1':
+        X['g1tg'] = lambda: G1TGParser(files['.g1t']).close()
+    return X
+
+def items(scale):
+    return scale.objects + scale.bones + scale.textures + scale.materials*(1 + scale.variants)
+
+# It returns the seconds of a call, which is the best of repeat runs of as many calls
+# as take at least 0.2 seconds.
+def time_call(f, repeat):
+    t = timeit.Timer(f)
+    n, _ = t.autorange()
+    return min(t.repeat(repeat, n)) / n
+
+# It returns the peak of allocations during a call, and what is left after it and
+# a collection, which is more than nothing if the parser leaks.
+def allocations(f):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        m = tracemalloc.get_traced_memory()[0]
+        f()
+        peak = tracemalloc.get_traced_memory()[1]
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return peak - m, current - m
+
+def main(argv):
+    args = parse_args(argv)
+    base = Scale()
+    R = []
+    for game in args.game or ('ngs1', 'ngs2'):
+        first = {}
+        for k in args.scales:
+            scale = base.scaled(k)
+            files = build_model(f'bench{k}', game, scale)
+            # Throughput is of the TMC, since the parsers only take views of the rest.
+            nbytes = len(files['.tmc'])
+            for name, f in operations(game, files).items():
+                t = time_call(f, args.repeat)
+                peak, retained = allocations(f)
+                per_item = t / items(scale)
+                growth = per_item / first.setdefault(name, per_item)
+                R.append({ 'game': game, 'scale': k, 'op': name, 'items': items(scale), 'nbytes': nbytes,
+                           'seconds': t, 'mb_per_s': nbytes / t / 1e6, 'peak_bytes': peak,
+                           'retained_bytes': retained, 'growth': growth })
+                mark = (growth > args.threshold and '!') or ' '
+                print(f'{game} x{k:<4} {name:<9} {1e6*t:12.1f} us {nbytes/t/1e6:10.1f} MB/s '
+                      f'peak {peak/1024:10.1f} KiB retained {retained:8} B  growth {growth:5.2f}{mark}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({ 'base_scale': base._asdict(), 'results': R }, f, indent=1)
+    # The exit status tells whether any parser is superlinear.
+    return int(any( x['growth'] > args.threshold for x in R ))
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else sys.argv[1:]))
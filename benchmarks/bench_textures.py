@@ -0,0 +1,69 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Compares loading DDS textures through a temporary file, as import_tmc used to,
+# against ninja_gaiden_tmc.texture.load_images, for increasing texture counts.
+#
+# Usage: blender -b --factory-startup -P benchmarks/bench_textures.py -- [count ...]
+
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ninja_gaiden_tmc.texture import load_images
+import bpy
+
+import tempfile
+import struct
+import time
+
+def make_dxt1(size):
+    linear_size = (size//4) * (size//4) * 8
+    header = b'DDS ' + struct.pack(
+            '< IIII III 44sII 4sIII IIII III',
+            124, 0xA1007, size, size,
+            linear_size, 0, 1,
+            44*b'', 32, 4,
+            b'DXT1', 0, 0, 0,
+            0, 0, 0x401008, 0,
+            0, 0, 0)
+    return header + os.urandom(linear_size)
+
+def load_via_tempfile(name, D):
+    images = []
+    with tempfile.NamedTemporaryFile(delete=False) as t:
+        t.close()
+        for x in D:
+            with open(t.name, t.file.mode) as f:
+                f.write(x)
+            x = bpy.data.images.load(t.name)
+            x.name = name
+            x.colorspace_settings.is_data = True
+            x.pack()
+            x.filepath_raw = ''
+            images.append(x)
+    os.remove(t.name)
+    return images
+
+def load_packed_images(name, D):
+    return load_images(name, D, reuse=False)
+
+def main(argv):
+    data = make_dxt1(2048)
+    for n in map(int, argv or ('1', '8', '32', '128')):
+        # Each texture differs, so that none is reused.
+        D = [ data[:-4] + struct.pack('< I', i) for i in range(n) ]
+        R = []
+        for f in (load_via_tempfile, load_packed_images):
+            t = time.perf_counter()
+            images = f('bench', D)
+            # Images are decoded lazily, so we force it to measure the whole load.
+            for x in images:
+                x.size[:]
+            R.append(time.perf_counter() - t)
+            for x in images:
+                bpy.data.images.remove(x)
+        print(f'{n:>5} textures  tempfile {R[0]:8.3f}s ({R[0]/n*1e3:7.2f} ms/tex)'
+              f'  packed {R[1]:8.3f}s ({R[1]/n*1e3:7.2f} ms/tex)')
+
+if __name__ == '__main__':
+    main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else [])
@@ -0,0 +1,427 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Writes synthetic models which tcmlib parses and the importers import, so that the
+# parsers and the importers can be measured without game assets. An NGS2 model is
+# a TMC and a TMCL, and an NGS1 model is a TMC (_minor_ver == 0), a TMCL and a G1TG.
+#
+# Each object is a grid of vertices in one GeoDecl chunk, split into ObjGeo chunks
+# which use the materials and the textures in turn. Every other object is skinned
+# to its bone and the parent of the bone. Bones form a binary tree.
+#
+# Usage: python benchmarks/synthetic.py DIRECTORY [ngs1|ngs2] [objects vertices bones textures variants]
+
+import os, sys
+import math
+import struct
+import zlib
+from typing import NamedTuple
+import numpy as np
+
+class Scale(NamedTuple):
+    objects: int = 8
+    # Vertices per object, which is rounded up to a square grid
+    vertices: int = 1024
+    bones: int = 32
+    textures: int = 4
+    # Color variants, i.e., MTRLCHNG of NGS2 or EXTMCOL of NGS1
+    variants: int = 2
+    materials: int = 8
+    # ObjGeo chunks per object
+    chunks: int = 2
+    texture_size: int = 64
+
+    def scaled(self, k):
+        return self._replace(objects=self.objects*k, vertices=self.vertices*k, bones=self.bones*k,
+                             textures=self.textures*k, variants=self.variants*k, materials=self.materials*k)
+
+# Chunk types of TMC
+MDLGEO, TTDM, VTXLAY, IDXLAY, MTRCOL = 0x8000_0001, 0x8000_0002, 0x8000_0003, 0x8000_0004, 0x8000_0005
+HIELAY, LHEADER, NODELAY, GLBLMTX, BNOFSMTX = 0x8000_0010, 0x8000_0020, 0x8000_0030, 0x8000_0040, 0x8000_0050
+OBJ_TYPE_INFO_HEAD, OBJ_TYPE_INFO, MTRLCHNG, EXTMCOL = 0x0000_0000, 0x0000_0001, 0x0000_0005, 0x0000_0015
+# Chunk types of LHeader
+TTDL_L, VTXLAY_L, IDXLAY_L = 0xC000_0002, 0xC000_0003, 0xC000_0004
+
+# D3DDECLTYPE, D3DDECLUSAGE and OBJ_TYPE
+FLOAT2, FLOAT3, UBYTE4, SHORT4N, USHORT2N, UDEC3 = 1, 2, 5, 10, 11, 13
+POSITION, BLENDWEIGHT, BLENDINDICES, NORMAL, TEXCOORD = 0, 1, 2, 3, 5
+NML, MOT, WGT = 0, 1, 3
+
+ALIGN = 16
+
+def pad(b, align = ALIGN):
+    return bytes(b) + bytes(-len(b) % align)
+
+def header(magic, minor_ver, header_nbytes, container_nbytes, chunks, offset_table_pos, size_table_pos,
+           sub_container_pos):
+    return struct.pack('< 8s bxbbI III4x III', magic.ljust(8, b'\0'), 0, 1, minor_ver, header_nbytes,
+                       container_nbytes, len(chunks), sum( 1 for c in chunks if c ),
+                       offset_table_pos, size_table_pos, sub_container_pos)
+
+# It lays out the header, the metadata, the offset table, the size table, the
+# sub-container and the chunks in this order. Empty chunks are absent, i.e., their
+# offsets are 0.
+def container(magic, chunks = (), metadata = b'', sub_container = b'', minor_ver = 1, sizes = False):
+    n = len(chunks)
+    o = 0x30 + len(pad(metadata))
+    offset_table_pos = n and o
+    o += len(pad(4*n*b'.'))
+    size_table_pos = (sizes and n and o) or 0
+    o += (size_table_pos and len(pad(4*n*b'.'))) or 0
+    sub_container_pos = (sub_container and o) or 0
+    o += len(pad(sub_container))
+    O = []
+    for c in chunks:
+        O.append(c and o)
+        o += len(pad(c))
+    h = header(magic, minor_ver, 0x30, o, chunks, offset_table_pos, size_table_pos, sub_container_pos)
+    return b''.join((
+            pad(h), pad(metadata),
+            pad(struct.pack(f'< {n}I', *O)),
+            (size_table_pos and pad(struct.pack(f'< {n}I', *map(len, chunks)))) or b'',
+            pad(sub_container), *map(pad, chunks)
+    ))
+
+# Chunks are laid out in ldata, which begins with the lhead like a section of TMCL.
+# It returns the container and ldata.
+def lcontainer(magic, lid, chunks, metadata = b''):
+    n = len(chunks)
+    O = []
+    o = ALIGN
+    for c in chunks:
+        O.append(c and o)
+        o += len(pad(c))
+    lhead = struct.pack('< III', lid, o, 0)
+    ldata = b''.join(( pad(lhead), *map(pad, chunks) ))
+
+    o = 0x50 + len(pad(metadata))
+    offset_table_pos = o
+    size_table_pos = o + len(pad(4*n*b'.'))
+    o = size_table_pos + len(pad(4*n*b'.'))
+    h = header(magic, 1, 0x50, o, chunks, offset_table_pos, size_table_pos, 0)
+    data = b''.join((
+            h.ljust(0x40, b'\0'), pad(lhead), pad(metadata),
+            pad(struct.pack(f'< {n}I', *O)), pad(struct.pack(f'< {n}I', *map(len, chunks)))
+    ))
+    return data, ldata
+
+# Nodes 0 to objects-1 are objects, which are children of bones. A skinned object is
+# weighted to its bone and the parent of the bone.
+class Hierarchy(NamedTuple):
+    parents: list
+    obj_types: list
+    # Local and global matrices for row vectors
+    matrices: np.ndarray
+    global_matrices: np.ndarray
+    # Node indices of the vertex groups of each object
+    node_groups: list
+
+def make_hierarchy(scale):
+    n, b = scale.objects, max(scale.bones, 1)
+    P, T, G = [], [], []
+    for j in range(n):
+        k = j % b
+        P.append(n + k)
+        skinned = j % 2 and k > 0
+        T.append((skinned and WGT) or NML)
+        G.append((skinned and [n + (k-1)//2, n + k]) or [j])
+    P += [ (k and n + (k-1)//2) or -1 for k in range(b) ]
+    T += b * [MOT]
+    M = np.tile(np.eye(4), (n + b, 1, 1))
+    for i in range(n + b):
+        M[i, 3, :3] = ((i % 2 and .05) or -.05, .1, 0)
+    # Parents come after their children only for objects, so bones are done first.
+    W = np.empty_like(M)
+    for i in (*range(n, n + b), *range(n)):
+        W[i] = M[i] if P[i] < 0 else M[i] @ W[P[i]]
+    return Hierarchy(P, T, M, W, G)
+
+def grid(vertex_count):
+    n = max(math.isqrt(max(vertex_count - 1, 0)) + 1, 2)
+    y, x = np.mgrid[0:n, 0:n] / (n - 1)
+    return n, x.ravel(), y.ravel()
+
+def grid_triangles(n):
+    i = np.arange(n*n).reshape(n, n)[:-1, :-1].ravel()
+    return np.column_stack((i, i+n, i+1, i+1, i+n, i+n+1)).ravel()
+
+# Each row is a strip, and rows are joined by degenerate triangles.
+def grid_strip(n):
+    S = []
+    for r in range(n - 1):
+        X = np.empty(2*n, np.int64)
+        X[0::2] = r*n + np.arange(n)
+        X[1::2] = (r+1)*n + np.arange(n)
+        if S:
+            S.append(np.array((S[-1][-1], X[0])))
+        S.append(X)
+    return np.concatenate(S)
+
+# It splits indices into (first_index_index, index_count) of chunks, by unit indices.
+# Spans of strips overlap by two, so no triangle is lost.
+def split_spans(n, parts, unit, overlap):
+    B = [ (n*i//parts)//unit*unit for i in range(parts) ] + [n]
+    return [ (b, min(e + overlap, n) - b) for b, e in zip(B[:-1], B[1:]) if e > b ]
+
+def vertex_buffer(game, vertex_count, skinned, seed):
+    n, x, z = grid(vertex_count)
+    F = [('position0', '<f4', 3)]
+    if game == 'ngs1':
+        F += (skinned and [('blendweight0', '<f4', 2)]) or []
+        F += [('normal0', '<f4', 3), ('texcoord0', '<f2', 2)]
+    else:
+        F += [('normal0', '<f4', 3), ('texcoord0', '<f2', 4)]
+        F += (skinned and [('blendweight0', 'u1', 4), ('blendindices0', 'u1', 4)]) or []
+    V = np.zeros(n*n, F)
+    V['position0'] = np.column_stack((x - .5, .01*seed + 0*x, z - .5))
+    V['normal0'] = (0, 1, 0)
+    V['texcoord0'][:, 0::2] = x[:, None]
+    V['texcoord0'][:, 1::2] = z[:, None]
+    if skinned and game == 'ngs1':
+        V['blendweight0'] = np.column_stack((x, 1 - x))
+    elif skinned:
+        w = np.round(0xff * x).astype(np.uint8)
+        V['blendweight0'] = np.column_stack((w, 0xff - w, 0*w, 0*w))
+        V['blendindices0'] = (0, 1, 0, 0)
+    E, o = [], 0
+    for name, base, count in F:
+        E.append((0, o, VERTEX_DECL_TYPES[game, name], 0, VERTEX_DECL_USAGES[name], 0))
+        o += np.dtype(base).itemsize * count
+    return V, E
+
+VERTEX_DECL_TYPES = {
+        ('ngs1', 'position0'): FLOAT3, ('ngs1', 'normal0'): FLOAT3, ('ngs1', 'blendweight0'): FLOAT2,
+        ('ngs1', 'texcoord0'): SHORT4N,
+        ('ngs2', 'position0'): FLOAT3, ('ngs2', 'normal0'): FLOAT3, ('ngs2', 'blendweight0'): UDEC3,
+        ('ngs2', 'blendindices0'): UBYTE4, ('ngs2', 'texcoord0'): USHORT2N,
+}
+VERTEX_DECL_USAGES = {
+        'position0': POSITION, 'normal0': NORMAL, 'blendweight0': BLENDWEIGHT,
+        'blendindices0': BLENDINDICES, 'texcoord0': TEXCOORD,
+}
+
+def index_buffer(game, vertex_count):
+    n = math.isqrt(vertex_count)
+    X = grid_triangles(n) if game == 'ngs1' else grid_strip(n)
+    return X.astype((vertex_count < 1<<16 and '<u2') or '<u4')
+
+def geodecl_chunk(game, buffer_index, index_count, vertex_count, vertex_nbytes, elements):
+    E = b''.join( struct.pack('< hhBBBB', *e) for e in elements )
+    if game == 'ngs1':
+        return pad(struct.pack('< IIII II', 0x20, 1, buffer_index, index_count, vertex_count, 0)) \
+               + pad(struct.pack('< III', buffer_index, vertex_nbytes, len(E)//8), 0x20) \
+               + bytes(0x10*len(elements)) + pad(struct.pack('< II', len(elements), vertex_nbytes)) + E
+    return struct.pack('< IIII IIII', 0, 0x38, 1, buffer_index, index_count, vertex_count, 0, 0).ljust(0x38, b'\0') \
+           + struct.pack('< II III4x', buffer_index, vertex_nbytes, len(elements), 0, 0) + E
+
+# Textures are (usage, color_usage, texture_index), i.e., albedo and normal maps.
+def objgeo_chunk(game, chunk_index, mtrcol_index, first_index, index_count, vertex_count, textures):
+    if game == 'ngs1':
+        c = bytearray(0x80)
+        struct.pack_into('< iiiI IIII', c, 0, chunk_index, mtrcol_index, 0, 0, first_index, index_count,
+                         len(textures), 0)
+        struct.pack_into('< IIBBBBI', c, 0x40, 0, vertex_count, 0, 0, 0x20, 0x22, 1)
+        struct.pack_into('< IIII IIII', c, 0x60, 0, 1, 0, 4, 5, 1, 1, 0)
+        T = []
+        for i, (usage, color_usage, texture_index) in enumerate(textures):
+            t = bytearray(0x70)
+            struct.pack_into('< IIiI I', t, 0, i, usage, texture_index, 0, color_usage)
+            struct.pack_into('< III', t, 0x4c, 1, 1, 1)
+            struct.pack_into('< If', t, 0x60, 12, -1)
+            T.append(t)
+        struct.pack_into(f'< {len(T)}I', c, 0x20, *range(0x80, 0x80 + 0x70*len(T), 0x70))
+        return bytes(c) + b''.join(T)
+
+    c = bytearray(0xe0)
+    struct.pack_into('< iiII', c, 0, chunk_index, mtrcol_index, 0, len(textures))
+    struct.pack_into('< I', c, 0x38, 0)
+    struct.pack_into('< II', c, 0x68, 1, 5)
+    struct.pack_into('< I?3xII II', c, 0x70, 1, False, first_index, index_count, 0, vertex_count)
+    struct.pack_into('< ffff', c, 0xa0, 1, 0, 1, 1)
+    struct.pack_into('< II', c, 0xb8, 1, 1)
+    T = []
+    for i, (usage, color_usage, texture_index) in enumerate(textures):
+        t = bytearray(0x80)
+        struct.pack_into('< IIII II', t, 0, i, usage, texture_index, 0, color_usage, 1)
+        struct.pack_into('< III', t, 0x38 + 0x14, 1, 1, 1)
+        struct.pack_into('< ffff', t, 0x38 + 0x20, 0, 0, 12, -1)
+        struct.pack_into('< I', t, 0x38 + 0x40, 2)
+        T.append(t)
+    struct.pack_into(f'< {len(T)}I', c, 0x10, *range(0xe0, 0xe0 + 0x80*len(T), 0x80))
+    return bytes(c) + b''.join(T)
+
+def objgeo(game, obj_index, name, geodecl, chunks):
+    if game == 'ngs1':
+        metadata = struct.pack('< HHiII 16s', 0, 9, obj_index, 0, 2, name)
+    else:
+        metadata = struct.pack('< HHiII 8x8x 16s', 3, 1, obj_index, 0, 0, name)
+    return container(b'ObjGeo', chunks, metadata, container(b'GeoDecl', [geodecl]))
+
+# Parameters of the k-th material. The fourth specular power is the IOR-like exponent.
+# A variant changes the emission of every third material.
+def mtrcol_params(k, variant = 0):
+    f = ((k * 7 + 3*(variant > 0 and (k + variant) % 3 == 0)) % 10) / 10
+    return (f, f, f, 1,  .5, .5, .5, 1,  1, 1, 1, 100)
+
+def mtrcol_chunk(game, k, xrefs, variant = 0):
+    p = mtrcol_params(k, variant)
+    X = b''.join( struct.pack('< iI', *x) for x in xrefs )
+    if game == 'ngs1':
+        return struct.pack('< 4f 4f 3f4x 3f4x 4f iI', *p[:8], *p[8:11], 0, 0, 0, p[11], 1, 1, 0, k, len(xrefs)) + X
+    c = bytearray(0xd8)
+    struct.pack_into('< 4f 4f 4f', c, 0, *p)
+    struct.pack_into('< ff', c, 0x68, 1, 1)
+    struct.pack_into('< 4f 4f', c, 0x80, 1, 1, 1, .5, 1, 1, 1, .5)
+    struct.pack_into('< iI', c, 0xd0, k, len(xrefs))
+    return bytes(c) + X
+
+def dxt1(size, seed):
+    n = max(size//4, 1)**2 * 8
+    return np.random.default_rng(seed).bytes(n)
+
+def dds(size, seed):
+    data = dxt1(size, seed)
+    return b'DDS ' + struct.pack(
+            '< IIII III 44sII 4sIII IIII III',
+            124, 0xA1007, size, size,
+            len(data), 0, 1,
+            44*b'', 32, 4,
+            b'DXT1', 0, 0, 0,
+            0, 0, 0x401008, 0,
+            0, 0, 0) + data
+
+def g1tg(scale, seed):
+    s = max(scale.texture_size.bit_length() - 1, 2)
+    T = [ struct.pack('< BBBB', 1 << 4, 0x06, s << 4 | s, 0) + struct.pack('> I', 0) + dxt1(1 << s, seed + i)
+          for i in range(scale.textures) ]
+    O, o = [], 4*len(T)
+    for t in T:
+        O.append(o)
+        o += len(t)
+    body = struct.pack(f'< {len(T)}I', *O) + b''.join(T)
+    return b'G1TG0050' + struct.pack('< III', 0x20 + len(body), 0x20, len(T)) + bytes(0xc) + body
+
+# It returns the files of a model by their suffixes, i.e., ".tmc", ".tmcl" and
+# ".g1t" for NGS1.
+def build_model(name, game = 'ngs2', scale = Scale()):
+    name = name.encode()[:15]
+    seed = zlib.crc32(name)
+    H = make_hierarchy(scale)
+    n = scale.objects
+    node_count = len(H.parents)
+
+    # Geometry and materials
+    V, I, objgeos = [], [], []
+    xrefs = [ {} for _ in range(max(scale.materials, 1)) ]
+    for j in range(n):
+        skinned = H.obj_types[j] == WGT
+        vbuf, elements = vertex_buffer(game, scale.vertices, skinned, j)
+        ibuf = index_buffer(game, len(vbuf))
+        V.append(vbuf.tobytes())
+        I.append(ibuf.tobytes())
+        spans = split_spans(len(ibuf), max(scale.chunks, 1), *((game == 'ngs1' and (3, 0)) or (2, 2)))
+        C = []
+        for i, (o, count) in enumerate(spans):
+            k = (j + i) % len(xrefs)
+            xrefs[k][j] = xrefs[k].get(j, 0) + 1
+            T = ()
+            if scale.textures:
+                t = (j + i) % scale.textures
+                T = ((0, 5, t), (1, 0, (t + 1) % scale.textures))
+            C.append(objgeo_chunk(game, i, k, o, count, len(vbuf), T))
+        geodecl = geodecl_chunk(game, j, len(ibuf), len(vbuf), vbuf.dtype.itemsize, elements)
+        objgeos.append(objgeo(game, j, b'obj%d' % j, geodecl, C))
+    mdlgeo = container(b'MdlGeo', objgeos)
+    mtrcols = [ mtrcol_chunk(game, k, sorted(x.items())) for k, x in enumerate(xrefs) ]
+    mtrcol = container(b'MtrCol', mtrcols)
+
+    M = H.matrices.astype(np.float32)
+    children = [ [] for _ in range(node_count) ]
+    for i, p in enumerate(H.parents):
+        if p > -1:
+            children[p].append(i)
+
+    if game == 'ngs1':
+        hielay = container(b'HieLay', [ struct.pack('< 16f iI8x', *M[i].ravel(), H.parents[i], len(X))
+                                        + struct.pack(f'< {len(X)}i', *X) for i, X in enumerate(children) ],
+                           minor_ver=0)
+        # OBJ_TYPE_INFO has three tables, of which only the second one, the OBJ_TYPE
+        # of each node, is read.
+        obj_type_info = struct.pack('< 32x IIII I12x', 0x40, 0, 0x40, node_count, 0) \
+                        + struct.pack(f'< {node_count}I', *H.obj_types)
+        chunks = [(MDLGEO, mdlgeo), (MTRCOL, mtrcol), (HIELAY, hielay), (OBJ_TYPE_INFO, obj_type_info)]
+        if scale.variants:
+            X = [ struct.pack('< 4f 4f 4f 4f 4f i', *mtrcol_params(k, v), 0, 0, 0, 0, 100, 1, 1, 0, k)
+                  for v in range(1, scale.variants + 1) for k in range(len(xrefs)) ]
+            chunks.append((EXTMCOL, container(b'EXTMCOL', X, struct.pack('< II', scale.variants, len(xrefs)))))
+        metadata = struct.pack('< HH12x 16x 16s', 0, 0, name).ljust(0x60, b'\0') \
+                   + struct.pack(f'< {len(chunks)}I', *( t for t, _ in chunks ))
+        tmc = container(b'TMC', [ c for _, c in chunks ], metadata, minor_ver=0)
+        tmcl = container(b'VtxLay', V, minor_ver=0, sizes=True) + container(b'IdxLay', I, minor_ver=0, sizes=True)
+        return { '.tmc': tmc, '.tmcl': tmcl, '.g1t': g1tg(scale, seed) }
+
+    depth = node_count * [0]
+    for i in (*range(n, node_count), *range(n)):
+        depth[i] = (H.parents[i] > -1 and depth[H.parents[i]] + 1) or 0
+    hielay = container(b'HieLay', [ struct.pack('< 16f iII4x', *M[i].ravel(), H.parents[i], len(X), depth[i])
+                                    + struct.pack(f'< {len(X)}i', *X) for i, X in enumerate(children) ])
+    names = [ b'obj%d' % j for j in range(n) ] + [ b'bone%d' % k for k in range(node_count - n) ]
+    nodeobjs = []
+    for i in range(node_count):
+        metadata = struct.pack('< Iii4x', 0, 0, i) + pad(names[i] + b'\0')
+        C = []
+        if i < n:
+            C = [ struct.pack('< iIi4x 16f', i, len(H.node_groups[i]), i, *np.eye(4).ravel())
+                  + struct.pack(f'< {len(H.node_groups[i])}i', *H.node_groups[i]) ]
+        nodeobjs.append(container(b'NodeObj', C, metadata))
+    nodelay = container(b'NodeLay', nodeobjs)
+    glblmtx = container(b'GlblMtx', [ struct.pack('< 16f', *m.ravel()) for m in H.global_matrices ])
+    bnofsmtx = container(b'BnOfsMtx', [ struct.pack('< 16f', *np.linalg.inv(m).ravel()) for m in H.global_matrices ])
+    # OBJ_TYPE_INFO is a table of (position, count) pairs, and a table of offsets to
+    # (OBJ_TYPE, ?, ?) of each node.
+    obj_type_head = struct.pack('< 16H', 0, node_count, *( 7 * (node_count, 0) ))
+    obj_type_info = struct.pack(f'< {node_count}I', *range(4*node_count, 16*node_count, 12)) \
+                    + b''.join( struct.pack('< III', t, 0, 0) for t in H.obj_types )
+
+    # Textures, vertex buffers and index buffers are in TMCL.
+    lid = seed & 0xffff_fff0
+    ttdh = container(b'TTDH', [ struct.pack('< ?3xi', True, i) for i in range(scale.textures) ])
+    ttdl, ttdl_l = lcontainer(b'TTDL', lid | 1, [ dds(scale.texture_size, seed + i) for i in range(scale.textures) ])
+    ttdm = container(b'TTDM', (), ttdh, ttdl)
+    vtxlay, vtxlay_l = lcontainer(b'VtxLay', lid | 2, V)
+    idxlay, idxlay_l = lcontainer(b'IdxLay', lid | 3, I)
+    lheader, tmcl = lcontainer(b'LHeader', lid, [ttdl_l, vtxlay_l, idxlay_l],
+                               bytes(0x20) + struct.pack('< III', TTDL_L, VTXLAY_L, IDXLAY_L))
+
+    chunks = [(MDLGEO, mdlgeo), (TTDM, ttdm), (VTXLAY, vtxlay), (IDXLAY, idxlay), (MTRCOL, mtrcol),
+              (HIELAY, hielay), (LHEADER, lheader), (NODELAY, nodelay), (GLBLMTX, glblmtx),
+              (BNOFSMTX, bnofsmtx), (OBJ_TYPE_INFO_HEAD, obj_type_head), (OBJ_TYPE_INFO, obj_type_info)]
+    if scale.variants:
+        X = b''.join( mtrcol_chunk('ngs2', k, (), v)[:0xd0]
+                      for v in range(1, scale.variants + 1) for k in range(len(xrefs)) )
+        chunks.append((MTRLCHNG, container(b'MTRLCHNG', [bytes(ALIGN), bytes(ALIGN), X],
+                                           struct.pack('< HHIII', 0, 0, 0, scale.variants, len(xrefs)))))
+    metadata = struct.pack('< HH4xI4x I4x8x 16s', 0, 0, 0, 4, name).ljust(0xc0, b'\0') \
+               + struct.pack(f'< {len(chunks)}I', *( t for t, _ in chunks ))
+    tmc = container(b'TMC', [ c for _, c in chunks ], metadata)
+    return { '.tmc': tmc, '.tmcl': tmcl }
+
+# It writes the files of a model as directory/name.*, and returns their paths by
+# their suffixes.
+def write_model(directory, name, game = 'ngs2', scale = Scale()):
+    P = {}
+    for suffix, data in build_model(name, game, scale).items():
+        P[suffix] = p = os.path.join(directory, name + suffix)
+        with open(p, 'wb') as f:
+            f.write(data)
+    return P
+
+def main(argv):
+    directory, game, *X = (len(argv) < 2 and [*argv, 'ngs2']) or argv
+    os.makedirs(directory, exist_ok=True)
+    scale = Scale(*map(int, X))
+    for p in write_model(directory, f'synthetic_{game}', game, scale).values():
+        print(p)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -2,19 +2,65 @@
 # and also marked with CC0 1.0. This file is a part of NINJA GAIDEN SIGMA 2 TMC Importer.
 
 from . import tcmlib
-from .ngs1.importer import import_tmc as ngs1_import_tmc
-from .ngs2.importer import import_tmc as ngs2_import_tmc
+from .tcmlib.g1tg import G1TGParser
+from .tcmlib.companion import list_files, CompanionIndex, TMCFileSet
+from .tcmlib.pool import DecodePool
+from .tcmlib.instrument import phase
+from .ngs1.importer import import_tmc_stages as ngs1_import_tmc_stages
+from .ngs2.importer import import_tmc_stages as ngs2_import_tmc_stages
+from .modal import StagedImport, run_stages, user_directory
+from .variant import get_variant_count, materialize_color_variant, update_color_variant, VARIANT_TABLE
 
 import bpy
 
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty
-from bpy.types import Operator
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty
+from bpy.types import Operator, Panel
 
+from contextlib import nullcontext, ExitStack
 import os
 import mmap
+import time
+import hashlib
 
-class NGS1SelectG1TGImportTMC(Operator, ImportHelper):
+COLOR_VARIANTS_ITEMS = (
+        ('COLLECTIONS', 'Collections', 'Copy the objects into a collection for each color variant'),
+        ('MATERIALS', 'Switchable Materials', 'Keep one set of objects, and switch their materials by Color Variant of the armature'),
+)
+
+# Options shared by the import operators, which are passed to import_tmc by
+# import_options, except decode_processes.
+class ImportOptions:
+    decode_textures: BoolProperty(
+            name='Decode Textures',
+            description='Decode DXT1, DXT5 and ARGB textures in parallel instead of by Blender\'s DDS loader',
+            default=False,
+    )
+
+    reuse_data: BoolProperty(
+            name='Reuse Materials and Images',
+            description='Use materials and images which have already been imported from the same data',
+            default=True,
+    )
+
+    color_variants: EnumProperty(
+            name='Color Variants',
+            items=COLOR_VARIANTS_ITEMS,
+            default='COLLECTIONS',
+    )
+
+    decode_processes: IntProperty(
+            name='Decoding Processes',
+            description='Number of processes which decode geometry. 1 decodes it in Blender, and 0 uses all cores',
+            default=1,
+            min=0,
+    )
+
+    def import_options(self):
+        return { 'decode_textures': self.decode_textures, 'reuse_data': self.reuse_data,
+                 'color_variants': self.color_variants }
+
+class NGS1SelectG1TGImportTMC(Operator, ImportHelper, ImportOptions, StagedImport):
     bl_idname = 'ninja_gaiden_tmc.ngs1_select_g1tg_import_tmc'
     bl_label = 'Select TMCL2 or G1TG'
     bl_options = {'REGISTER', 'UNDO'}
@@ -41,14 +87,8 @@ class NGS1SelectG1TGImportTMC(Operator, ImportHelper):
         if not self.tmc_path or not self.tmcl_path:
             return {'CANCELLED'}
 
-        try:
-            with (mmap_open(self.tmc_path) as tmc, mmap_open(self.tmcl_path) as tmcl,
-                  mmap_open(self.filepath) as g1tg, tcmlib.ngs1.TMCParser(tmc, tmcl) as tmc):
-                ngs1_import_tmc(context, tmc, g1tg)
-        except tcmlib.ParserError as e:
-            self.report({'ERROR'}, f"Failed to parse TMC: {e}")
-            return {'CANCELLED'}
-        return {'FINISHED'}
+        s = TMCFileSet('ngs1', self.tmc_path, self.tmcl_path, self.filepath)
+        return run_staged_import(self, s)
 
 class NGS1SelectTMCL(Operator, ImportHelper):
     bl_idname = 'ninja_gaiden_tmc.ngs1_select_tmcl'
@@ -69,7 +109,7 @@ class NGS1SelectTMCL(Operator, ImportHelper):
     def execute(self, context):
         return bpy.ops.ninja_gaiden_tmc.ngs1_select_g1tg_import_tmc('INVOKE_DEFAULT', tmc_path=self.tmc_path, tmcl_path=self.filepath, directory=self.directory)
 
-class NGS2SelectTMCLImportTMC(Operator, ImportHelper):
+class NGS2SelectTMCLImportTMC(Operator, ImportHelper, ImportOptions, StagedImport):
     bl_idname = 'ninja_gaiden_tmc.ngs2_select_tmcl_import_tmc'
     bl_label = 'Select TMCL'
     bl_options = {'REGISTER', 'UNDO'}
@@ -90,13 +130,8 @@ class NGS2SelectTMCLImportTMC(Operator, ImportHelper):
         if not self.tmc_path:
             return {'CANCELLED'}
 
-        try:
-            with mmap_open(self.tmc_path) as tmc, mmap_open(self.filepath) as tmcl, tcmlib.ngs2.TMCParser(tmc, tmcl) as tmc:
-                ngs2_import_tmc(context, tmc)
-        except tcmlib.ParserError as e:
-            self.report({'ERROR'}, f"Failed to parse TMC: {e}")
-            return {'CANCELLED'}
-        return {'FINISHED'}
+        s = TMCFileSet('ngs2', self.tmc_path, self.filepath, None)
+        return run_staged_import(self, s)
 
 class ImportTMCEntry(Operator, ImportHelper):
     '''Load a TMC file'''
@@ -128,18 +163,184 @@ class ImportTMCEntry(Operator, ImportHelper):
         else:
             return bpy.ops.ninja_gaiden_tmc.ngs2_select_tmcl_import_tmc('INVOKE_DEFAULT', tmc_path=self.filepath, directory=self.directory)
 
+class MaterializeColorVariant(Operator):
+    '''Copy the objects of the armature with the materials of a color variant into a new collection'''
+    bl_idname = 'ninja_gaiden_tmc.materialize_color_variant'
+    bl_label = 'Materialize Color Variant'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    variant: IntProperty(name='Color Variant', min=1)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and VARIANT_TABLE in context.object
+
+    def invoke(self, context, event):
+        self.variant = max(context.object.tmc_color_variant, 1)
+        return self.execute(context)
+
+    def execute(self, context):
+        o = context.object
+        if self.variant > get_variant_count(o):
+            self.report({'ERROR'}, f"{o.name} has no color variant {self.variant}")
+            return {'CANCELLED'}
+        # An armature in no collection of its own gets the collection in the context.
+        parent = (o.users_collection and o.users_collection[0]) or context.collection or context.scene.collection
+        C = bpy.data.collections.new(parent.name)
+        parent.children.link(C)
+        materialize_color_variant(o, self.variant, C)
+        return {'FINISHED'}
+
+class ColorVariantPanel(Panel):
+    bl_idname = 'OBJECT_PT_ninja_gaiden_tmc_color_variant'
+    bl_label = 'Color Variants'
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'object'
+
+    @classmethod
+    def poll(cls, context):
+        return context.object and VARIANT_TABLE in context.object
+
+    def draw(self, context):
+        o = context.object
+        self.layout.prop(o, 'tmc_color_variant')
+        self.layout.label(text=f'{get_variant_count(o)} variants')
+        self.layout.operator(MaterializeColorVariant.bl_idname)
+
+class ImportTMCDirectory(Operator, ImportOptions):
+    '''Load all TMC files in a directory with their TMCL and G1TG files'''
+    bl_idname = 'ninja_gaiden_tmc.import_tmc_directory'
+    bl_label = 'Import TMC Directory'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    directory: StringProperty(subtype='DIR_PATH')
+    filter_folder: BoolProperty(default=True, options={'HIDDEN'})
+
+    recursive: BoolProperty(
+            name='Recursive',
+            description='Also search subdirectories',
+            default=False,
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        index_path = companion_index_path(self.directory, self.recursive)
+        index = CompanionIndex.load(index_path)
+        index.update(list_files(self.directory, self.recursive))
+        try:
+            index.save(index_path)
+        except OSError as e:
+            self.report({'WARNING'}, f"Failed to save the companion index: {e}")
+        S = index.file_sets()
+        if not S:
+            self.report({'WARNING'}, f"No TMC found in {self.directory}")
+            return {'CANCELLED'}
+
+        t = time.perf_counter()
+        imported = nbytes = 0
+        # The pool is shared by all files, so the processes start only once.
+        with new_decode_pool(self.decode_processes) as pool:
+            for s in S:
+                try:
+                    import_tmc_file_set(context, s, pool, **self.import_options())
+                except Exception as e:
+                    # A failed file doesn't abort the batch.
+                    self.report({'WARNING'}, f"Failed to import {s.tmc}: {e}")
+                    continue
+                imported += 1
+                nbytes += sum( os.path.getsize(p) for p in s[1:] if p )
+        t = time.perf_counter() - t
+        self.report({'INFO'}, f"Imported {imported} of {len(S)} TMC in {t:.1f} s "
+                              f"({imported/t:.2f} TMC/s, {nbytes/t/2**20:.1f} MiB/s)")
+        return {'FINISHED'}
+
+# Companion indices are kept in the user directory of the add-on, one per directory.
+def companion_index_path(directory, recursive):
+    d = user_directory('companion_index')
+    h = hashlib.blake2b(f'{os.path.abspath(directory)}\0{recursive}'.encode(), digest_size=8).hexdigest()
+    return os.path.join(d, f'{h}.json')
+
+# It imports a TMC file with its TMCL and G1TG files, which are searched for in the
+# directory of the TMC if not given, and returns the collection of the model. It
+# can be called from scripts, e.g. in blender -b. options are the ones of import_tmc,
+# i.e., decode_textures, reuse_data and color_variants.
+def import_file(tmc, tmcl = None, g1tg = None, context = None, decode_processes = 1, **options):
+    context = context or bpy.context
+    index = CompanionIndex()
+    index.update([tmc])
+    try:
+        game = index.signatures[tmc].game
+    except KeyError:
+        raise tcmlib.ParserError(f'{tmc} is not TMC') from None
+    if not tmcl or (game == 'ngs1' and not g1tg):
+        index.update(list_files(os.path.dirname(os.path.abspath(tmc))))
+        tmc = os.path.abspath(tmc)
+        tmcl = tmcl or index.find_tmcl(tmc)
+        g1tg = g1tg or index.find_g1tg(tmc)
+    with new_decode_pool(decode_processes) as pool:
+        return import_tmc_file_set(context, TMCFileSet(game, tmc, tmcl, g1tg), pool, **options)
+
+# It runs the import of a file set by a StagedImport operator with its options.
+def run_staged_import(op, s):
+    stack = ExitStack()
+    pool = stack.enter_context(new_decode_pool(op.decode_processes))
+    # The stages run after execute returns, when only bpy.context is valid.
+    stages = import_tmc_file_set_stages(bpy.context, s, pool, **op.import_options())
+    return op.run_modal(bpy.context, stages, stack)
+
+def import_tmc_file_set(*args, **kwargs):
+    return run_stages(import_tmc_file_set_stages(*args, **kwargs))
+
+# Geometry is decoded by pool if given, or in this process.
+def import_tmc_file_set_stages(context, s, pool = None, **options):
+    if not s.tmcl:
+        raise FileNotFoundError(f'No TMCL found for {s.tmc}')
+    if s.game == 'ngs1' and not s.g1tg:
+        raise FileNotFoundError(f'No G1TG found for {s.tmc}')
+    with ExitStack() as stack:
+        with phase('parse'):
+            tmc = stack.enter_context(mmap_open(s.tmc))
+            tmcl = stack.enter_context(mmap_open(s.tmcl))
+            if s.game == 'ngs1':
+                g1tg = stack.enter_context(G1TGParser(stack.enter_context(mmap_open(s.g1tg))))
+                tmc = stack.enter_context(tcmlib.ngs1.TMCParser(tmc, tmcl))
+            else:
+                tmc = stack.enter_context(tcmlib.ngs2.TMCParser(tmc, tmcl))
+        d = pool and stack.enter_context(pool.geometry_decoder(s.game, s.tmc, s.tmcl, tmc))
+        if s.game == 'ngs1':
+            return (yield from ngs1_import_tmc_stages(context, tmc, g1tg, geometry_decoder=d, **options))
+        return (yield from ngs2_import_tmc_stages(context, tmc, geometry_decoder=d, **options))
+
+# 1 process decodes in this process, and 0 means all cores.
+def new_decode_pool(processes):
+    return (processes != 1 and DecodePool(processes or None)) or nullcontext()
+
 def mmap_open(path):
     with open(path, 'rb') as f:
         return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 def menu_func_import(self, context):
     self.layout.operator(ImportTMCEntry.bl_idname, text="Ninja Gaiden Master Collection TMC (.tmc)")
+    self.layout.operator(ImportTMCDirectory.bl_idname, text="Ninja Gaiden Master Collection TMC Directory")
 
 def register():
     bpy.utils.register_class(NGS1SelectG1TGImportTMC)
     bpy.utils.register_class(NGS1SelectTMCL)
     bpy.utils.register_class(NGS2SelectTMCLImportTMC)
     bpy.utils.register_class(ImportTMCEntry)
+    bpy.utils.register_class(ImportTMCDirectory)
+    bpy.utils.register_class(MaterializeColorVariant)
+    bpy.utils.register_class(ColorVariantPanel)
+    bpy.types.Object.tmc_color_variant = IntProperty(
+            name='Color Variant',
+            description='Color variant of the materials of the objects of this armature. 0 is the base',
+            min=0,
+            update=update_color_variant,
+    )
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
 
 def unregister():
@@ -147,6 +348,10 @@ def unregister():
     bpy.utils.unregister_class(NGS1SelectTMCL)
     bpy.utils.unregister_class(NGS2SelectTMCLImportTMC)
     bpy.utils.unregister_class(ImportTMCEntry)
+    bpy.utils.unregister_class(ImportTMCDirectory)
+    bpy.utils.unregister_class(MaterializeColorVariant)
+    bpy.utils.unregister_class(ColorVariantPanel)
+    del bpy.types.Object.tmc_color_variant
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+from .tcmlib.hierarchy import bone_tails
+from .mesh import rotate_yup_to_zup
+
+import bpy
+import numpy as np
+
+# It creates a bone for each node in a single pass, after computing all heads and tails
+# from the global matrices (for row vectors, Y-up) of the nodes. Rolls are left 0,
+# which is what transforming new zero-length bones by their matrices gave. Bones
+# are assigned to the bone collection named after their OBJ_TYPE, if any. It returns
+# the names of the bones, which may differ from names. If the tables differ in
+# length, only as many bones as the shortest one are created, as the bone loop
+# zipping them did, and parents beyond them are dropped.
+def build_armature(context, armature_obj, names, global_matrices, parents, obj_types):
+    a = armature_obj.data
+    G = np.asarray(global_matrices, np.float64).reshape(-1, 4, 4)
+    n = min(len(names), len(G), len(parents), len(obj_types))
+    names, G = names[:n], G[:n]
+    parents = np.asarray(parents[:n], np.intp)
+    parents[parents >= n] = -1
+    obj_types = [ t.name for t in obj_types[:n] ]
+    H = rotate_yup_to_zup(G[:, 3, :3])
+    T = bone_tails(H, parents, [ t == 'MOT' for t in obj_types ])
+
+    active_obj_saved = context.view_layer.objects.active
+    context.view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    B = [ a.edit_bones.new(n) for n in names ]
+    a.edit_bones.foreach_set('head', H.astype(np.float32).ravel())
+    a.edit_bones.foreach_set('tail', T.astype(np.float32).ravel())
+    for b, p, t in zip(B, parents.tolist(), obj_types):
+        if p > -1:
+            b.parent = B[p]
+        c = a.collections.get(t)
+        if c:
+            c.assign(b)
+    bone_names = [ b.name for b in B ]
+    bpy.ops.object.mode_set(mode='OBJECT')
+    context.view_layer.objects.active = active_obj_saved
+    return bone_names
@@ -0,0 +1,183 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Converts TMC models to .blend files without the UI, one .blend per model. The
+# models are listed in a manifest, which is sharded across Blender processes.
+#
+# Usage:
+#   blender -b --factory-startup -P cli.py -- manifest DIRECTORY [--recursive] -o MANIFEST
+#   blender -b --factory-startup -P cli.py -- convert MANIFEST -o OUT_DIR [--jobs N]
+#           [--decode-textures] [--no-reuse-data] [--color-variants COLLECTIONS|MATERIALS]
+#           [--decode-processes N]
+#
+# A manifest is a JSON list of models, each of which is a TMC path or an object with
+# "tmc" and optionally "tmcl", "g1tg" and "name". convert writes OUT_DIR/NAME.blend
+# for each model and OUT_DIR/summary.json with the timings and failures.
+
+import os, sys
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import subprocess
+import time
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(prog='cli.py')
+    sp = p.add_subparsers(dest='command', required=True)
+
+    x = sp.add_parser('manifest', help='List the TMC files in a directory with their companions')
+    x.add_argument('directory')
+    x.add_argument('--recursive', action='store_true')
+    x.add_argument('-o', '--output', required=True)
+
+    x = sp.add_parser('convert', help='Convert the models in a manifest to .blend files')
+    x.add_argument('manifest')
+    x.add_argument('-o', '--output', required=True)
+    x.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    x.add_argument('--decode-textures', action='store_true')
+    x.add_argument('--no-reuse-data', dest='reuse_data', action='store_false')
+    x.add_argument('--color-variants', choices=('COLLECTIONS', 'MATERIALS'), default='COLLECTIONS')
+    # Processes decoding geometry in each Blender process, see import_file.
+    x.add_argument('--decode-processes', type=int, default=1)
+    # Phases of each import are written to NAME.profile.json, and NAME.trace.json
+    # with --chrome-trace.
+    x.add_argument('--profile', action='store_true')
+    x.add_argument('--chrome-trace', action='store_true')
+    # Used by the processes which convert a shard, as I/N.
+    x.add_argument('--shard', help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+def make_manifest(args):
+    from ninja_gaiden_tmc.tcmlib.companion import list_files, find_tmc_file_sets
+    S = find_tmc_file_sets(list_files(args.directory, args.recursive))
+    M = [ { 'tmc': s.tmc, 'tmcl': s.tmcl, 'g1tg': s.g1tg } for s in S ]
+    with open(args.output, 'w') as f:
+        json.dump(M, f, indent=1)
+    print(f'{len(M)} models are written to {args.output}')
+
+# Each model gets a unique name, which is the stem of the TMC unless given.
+def load_manifest(path):
+    with open(path) as f:
+        M = json.load(f)
+    M = [ (isinstance(m, str) and { 'tmc': m }) or dict(m) for m in M ]
+    names = set()
+    for i, m in enumerate(M):
+        n = m.get('name') or os.path.splitext(os.path.basename(m['tmc']))[0]
+        if n in names:
+            n = f'{n}.{i}'
+        names.add(n)
+        m['name'] = n
+    return M
+
+# Models are dealt in descending order of TMC size, so every shard gets a similar
+# amount of work.
+def shard(M, i, n):
+    def nbytes(m):
+        try:
+            return os.path.getsize(m['tmc'])
+        except OSError:
+            return 0
+    return sorted(M, key=nbytes, reverse=True)[i::n]
+
+def convert(args):
+    os.makedirs(args.output, exist_ok=True)
+    M = load_manifest(args.manifest)
+    if args.shard:
+        i, n = map(int, args.shard.split('/'))
+        convert_shard(args, shard(M, i, n), os.path.join(args.output, f'summary.{i}.json'))
+        return
+
+    import bpy
+    n = max(min(args.jobs, len(M)), 1)
+    t = time.perf_counter()
+    P = []
+    for i in range(n):
+        cmd = [ bpy.app.binary_path, '-b', '--factory-startup', '-P', os.path.abspath(__file__), '--',
+                'convert', args.manifest, '-o', args.output, '--shard', f'{i}/{n}',
+                '--color-variants', args.color_variants, '--decode-processes', str(args.decode_processes) ]
+        cmd += (args.decode_textures and ['--decode-textures']) or []
+        cmd += (not args.reuse_data and ['--no-reuse-data']) or []
+        cmd += (args.profile and ['--profile']) or []
+        cmd += (args.chrome_trace and ['--chrome-trace']) or []
+        P.append(subprocess.Popen(cmd))
+
+    R = []
+    for i, p in enumerate(P):
+        code = p.wait()
+        try:
+            with open(os.path.join(args.output, f'summary.{i}.json')) as f:
+                X = json.load(f)['models']
+        except (OSError, ValueError):
+            X = []
+        # Models the process didn't report are failed.
+        done = { x['name'] for x in X }
+        X += [ { 'name': m['name'], 'tmc': m['tmc'], 'ok': False,
+                 'error': f'The process exited with {code}' }
+               for m in shard(M, i, n) if m['name'] not in done ]
+        R += X
+    t = time.perf_counter() - t
+
+    failed = [ x for x in R if not x['ok'] ]
+    summary = {
+            'models': len(R),
+            'failed': len(failed),
+            'jobs': n,
+            'wall_s': t,
+            'import_s': sum( x.get('import_s', 0) for x in R ),
+            'save_s': sum( x.get('save_s', 0) for x in R ),
+            'models_per_s': len(R) / t,
+            'results': sorted(R, key=lambda x: x['name']),
+    }
+    with open(os.path.join(args.output, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=1)
+    print(f'Converted {len(R) - len(failed)} of {len(R)} models with {n} processes in {t:.1f} s')
+    for x in failed:
+        print(f"Failed {x['tmc']}: {x['error']}")
+
+def convert_shard(args, M, summary_path):
+    import bpy
+    from ninja_gaiden_tmc import import_file
+    from ninja_gaiden_tmc.tcmlib.instrument import Profiler
+    from contextlib import nullcontext
+
+    R = []
+    for m in M:
+        x = { 'name': m['name'], 'tmc': m['tmc'] }
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        try:
+            t = time.perf_counter()
+            with (args.profile and Profiler()) or nullcontext() as profiler:
+                import_file(m['tmc'], m.get('tmcl'), m.get('g1tg'), decode_textures=args.decode_textures,
+                            reuse_data=args.reuse_data, color_variants=args.color_variants,
+                            decode_processes=args.decode_processes)
+            x['import_s'] = time.perf_counter() - t
+            if profiler:
+                p = os.path.join(os.path.abspath(args.output), m['name'])
+                x['profile'] = p + '.profile.json'
+                profiler.write_json(x['profile'], model=m['name'], tmc=m['tmc'], blender=bpy.app.version_string)
+                if args.chrome_trace:
+                    profiler.write_chrome_trace(p + '.trace.json')
+            t = time.perf_counter()
+            x['blend'] = p = os.path.join(os.path.abspath(args.output), m['name'] + '.blend')
+            bpy.ops.wm.save_as_mainfile(filepath=p)
+            x['save_s'] = time.perf_counter() - t
+            x['ok'] = True
+        except Exception as e:
+            x['ok'] = False
+            x['error'] = f'{type(e).__name__}: {e}'
+        R.append(x)
+        # We write the summary every time, so it survives a crash of Blender.
+        with open(summary_path, 'w') as f:
+            json.dump({ 'models': R }, f, indent=1)
+
+def main(argv):
+    args = parse_args(argv)
+    if args.command == 'manifest':
+        make_manifest(args)
+    else:
+        convert(args)
+
+if __name__ == '__main__':
+    main(sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else [])
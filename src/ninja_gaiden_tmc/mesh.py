@@ -0,0 +1,88 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+from .tcmlib.skin import group_influences
+from .tcmlib.instrument import phase
+
+import numpy as np
+
+# We fill an empty mesh with foreach_set in a handful of calls, instead of creating
+# BMVerts and BMFaces one by one. Each triangle becomes a flat-shaded face
+# like the ones bmesh creates by default.
+def set_geometry(mesh, positions, triangles, material_indices):
+    positions = np.ascontiguousarray(positions, np.float32).reshape(-1, 3)
+    triangles = np.ascontiguousarray(triangles, np.int32).reshape(-1, 3)
+
+    mesh.vertices.add(len(positions))
+    mesh.vertices.foreach_set('co', positions.ravel())
+
+    mesh.loops.add(3*len(triangles))
+    mesh.loops.foreach_set('vertex_index', triangles.ravel())
+
+    mesh.polygons.add(len(triangles))
+    mesh.polygons.foreach_set('loop_start', np.arange(0, 3*len(triangles), 3, dtype=np.int32))
+    mesh.polygons.foreach_set('material_index', np.ascontiguousarray(material_indices, np.int32))
+    mesh.polygons.foreach_set('use_smooth', np.zeros(len(triangles), bool))
+
+    mesh.update(calc_edges=True)
+
+# uvs has a UV per vertex, which we gather into the loops of the vertex and write
+# at once. loop_vertex_indices can be passed if the caller already has them.
+def set_uv_layer(mesh, name, uvs, loop_vertex_indices = None):
+    layer = mesh.uv_layers.new(name=name)
+    if loop_vertex_indices is None:
+        loop_vertex_indices = np.empty(len(mesh.loops), np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+    X = np.ascontiguousarray(np.asarray(uvs, np.float32)[loop_vertex_indices])
+    layer.data.foreach_set('uv', X.ravel())
+    return layer
+
+# We assign influences with one VertexGroup.add per (group, weight) pair, so the
+# cost scales with the number of distinct pairs instead of the number of influences.
+# Blend indices beyond the vertex groups are ignored, as the deform layer of bmesh
+# did.
+def add_weights(vertex_groups, vertices, groups, weights):
+    I = np.flatnonzero(groups < len(vertex_groups))
+    for g, w, V in group_influences(vertices[I], groups[I], weights[I]):
+        vertex_groups[g].add(V.tolist(), w, 'REPLACE')
+
+# normals has a normal per vertex. We pass the contiguous array itself, so no
+# Python object is created per normal.
+def set_custom_normals(mesh, normals):
+    mesh.normals_split_custom_set_from_vertices(np.ascontiguousarray(normals, np.float32).reshape(-1, 3))
+
+# The games are Y-up, while Blender is Z-up. This is the same as transforming
+# vectors by Euler((.5 * math.pi, 0, 0)).to_matrix().
+def rotate_yup_to_zup(vectors):
+    return vectors[:, (0, 2, 1)] * np.array((1, -1, 1), np.float32)
+
+# It fills the mesh of mesh_obj with an ObjGeoGeometry, after the vertex groups of
+# the bones. A vertex group is added for each GeoDecl chunk, and every vertex of a
+# rigid object belongs to the first vertex group fully.
+def set_objgeo_geometry(mesh_obj, geometry, rigid):
+    g = geometry
+    m = mesh_obj.data
+    VG = [ mesh_obj.vertex_groups.new(name="").index for _ in range(len(g.vertex_counts)) ]
+
+    # Positions and normals are converted to Z-up here instead of by Mesh.transform.
+    with phase('mesh.geometry', vertices=len(g.positions), faces=len(g.triangles)):
+        set_geometry(m, rotate_yup_to_zup(g.positions), g.triangles, g.material_indices)
+    with phase('mesh.uvs', layers=len(g.uvs)):
+        L = g.triangles.ravel()
+        for name, uvs in zip(('UVMap', 'UVMap.001', 'UVMap.002', 'UVMap.003'), g.uvs):
+            set_uv_layer(m, name, uvs, L)
+
+    # Influences are collected in the order they apply and assigned in batches.
+    n = len(g.positions)
+    V = [ np.arange(n, dtype=np.int32), g.influence_vertices ]
+    G = [ np.repeat(np.array(VG, np.int32), g.vertex_counts), g.influence_groups ]
+    W = [ np.zeros(n, np.float32), g.influence_weights ]
+    if rigid:
+        V.append(np.arange(n, dtype=np.int32))
+        G.append(np.zeros(n, np.int32))
+        W.append(np.ones(n, np.float32))
+    with phase('mesh.weights', influences=len(g.influence_vertices)):
+        add_weights(mesh_obj.vertex_groups, np.concatenate(V), np.concatenate(G), np.concatenate(W))
+
+    with phase('mesh.normals'):
+        set_custom_normals(m, rotate_yup_to_zup(g.normals))
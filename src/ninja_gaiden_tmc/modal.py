@@ -0,0 +1,177 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Imports are generators which yield their progress from 0 to 1 between stages,
+# i.e., the armature, each mesh, the textures, the materials of each ObjGeo and
+# the color variants, and return the collection of the model. Operators run them
+# a slice of time per timer event, so Blender keeps redrawing and views can be
+# navigated, and roll them back on Esc.
+
+from . import tcmlib
+from .tcmlib.instrument import Profiler
+
+import bpy
+from bpy.props import BoolProperty, FloatProperty
+
+from contextlib import ExitStack, nullcontext
+import os
+import tempfile
+import time
+
+class Progress:
+    def __init__(self, stage_count):
+        self.stage_count = max(stage_count, 1)
+        self.stage = 0
+
+    def step(self):
+        self.stage += 1
+        return min(self.stage / self.stage_count, 1)
+
+def run_stages(stages):
+    try:
+        while True:
+            next(stages)
+    except StopIteration as e:
+        return e.value
+
+# Files of the add-on are kept in the user directory of the extension, or in the
+# temporary directory if the add-on is not installed as an extension, e.g. as a
+# legacy add-on.
+def user_directory(path):
+    try:
+        return bpy.utils.extension_path_user(__package__, path=path, create=True)
+    except (AttributeError, ValueError):
+        d = os.path.join(tempfile.gettempdir(), __package__, path)
+        os.makedirs(d, exist_ok=True)
+        return d
+
+# Datablocks which imports create. Anything in them which is not in a snapshot is
+# removed by rollback.
+ID_COLLECTIONS = ('objects', 'meshes', 'armatures', 'materials', 'images', 'node_groups', 'collections')
+
+def snapshot_ids():
+    return { x.as_pointer() for n in ID_COLLECTIONS for x in getattr(bpy.data, n) }
+
+def remove_new_ids(snapshot):
+    bpy.data.batch_remove([ x for n in ID_COLLECTIONS for x in getattr(bpy.data, n)
+                            if x.as_pointer() not in snapshot ])
+
+# Events which only navigate views or redraw Blender are passed through during
+# an import. Others are blocked, so the scene doesn't change under the import.
+# Alt+Wheel changes the frame, so it's blocked too.
+NAVIGATION_EVENTS = frozenset((
+        'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE',
+        'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'WHEELINMOUSE', 'WHEELOUTMOUSE',
+        'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM', 'NDOF_MOTION',
+        *( f'NUMPAD_{i}' for i in range(10) ), 'NUMPAD_PERIOD', 'NUMPAD_SLASH',
+        'NUMPAD_PLUS', 'NUMPAD_MINUS', 'HOME',
+        'TIMER_REPORT', 'TIMERREGION', 'WINDOW_DEACTIVATE', 'NONE',
+))
+
+def is_navigation_event(event):
+    return event.type in NAVIGATION_EVENTS and not (event.alt and event.type.startswith('WHEEL'))
+
+# A mixin of import operators. execute returns run_modal with the stages and an
+# ExitStack of what they need, e.g. a decode pool, which is closed after the stages
+# end. Without a window, e.g. in blender -b, the stages run at once.
+class StagedImport:
+    time_slice: FloatProperty(
+            name='Time Slice',
+            description='Seconds of importing between redraws of Blender',
+            default=.1,
+            min=.01,
+    )
+    profile: BoolProperty(
+            name='Profile',
+            description='Measure the time and the memory of each phase of the import, and write them to the profiles directory of the add-on',
+            default=False,
+    )
+    chrome_trace: BoolProperty(
+            name='Chrome Trace',
+            description='Also write the phases of the profile in the Chrome trace event format',
+            default=False,
+    )
+
+    def run_modal(self, context, stages, stack = None):
+        self._stack = stack or ExitStack()
+        self._stages = stages
+        self._profiler = self.profile and Profiler()
+        self._stack.callback(stages.close)
+        self._snapshot = snapshot_ids()
+        if bpy.app.background or not context.window:
+            r = {'RUNNING_MODAL'}
+            while r == {'RUNNING_MODAL'}:
+                r = self._step(context, float('inf'))
+            return r
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(.01, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 1)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._end(context)
+            self._rollback()
+            self.report({'WARNING'}, 'Import cancelled')
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return (is_navigation_event(event) and {'PASS_THROUGH'}) or {'RUNNING_MODAL'}
+        try:
+            r = self._step(context, self.time_slice)
+        except BaseException:
+            self._end(context)
+            raise
+        if r == {'RUNNING_MODAL'}:
+            context.window_manager.progress_update(self._progress)
+        else:
+            self._end(context)
+        return r
+
+    # It runs stages for up to time_slice seconds. The profiler is only entered
+    # here, so it doesn't measure Blender between timer events, and its total is
+    # comparable with the one of cli.py.
+    def _step(self, context, time_slice):
+        t = time.perf_counter() + time_slice
+        try:
+            with self._profiler or nullcontext():
+                while time.perf_counter() < t:
+                    self._progress = next(self._stages)
+        except StopIteration as e:
+            self._stack.close()
+            if self._profiler:
+                self._write_profile(e.value)
+            return {'FINISHED'}
+        except tcmlib.ParserError as e:
+            self._rollback()
+            self.report({'ERROR'}, f"Failed to parse TMC: {e}")
+            return {'CANCELLED'}
+        except BaseException:
+            self._rollback()
+            raise
+        return {'RUNNING_MODAL'}
+
+    def _write_profile(self, collection):
+        p = self._profiler
+        for l in p.report_lines():
+            self.report({'INFO'}, l)
+        name = bpy.path.clean_name(getattr(collection, 'name', 'import'))
+        # The import has succeeded, so a profile which can't be written is only reported.
+        try:
+            path = os.path.join(user_directory('profiles'), f"{time.strftime('%Y%m%d-%H%M%S')}-{name}")
+            p.write_json(path + '.json', model=name, blender=bpy.app.version_string)
+            if self.chrome_trace:
+                p.write_chrome_trace(path + '.trace.json')
+        except OSError as e:
+            self.report({'WARNING'}, f'Failed to write the profile: {e}')
+            return
+        self.report({'INFO'}, f'Profile is written to {path}.json')
+
+    def _rollback(self):
+        self._stack.close()
+        remove_new_ids(self._snapshot)
+
+    def _end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
@@ -0,0 +1,163 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+import bpy
+
+import hashlib
+
+# The MtrCol → BSDF logic is built once as a node group, which every material shares.
+# A material has the group node, and image and UV map nodes linked to its texture
+# slots. Factor inputs (e.g. "Overlay") enable a slot when it is set to 1.
+SHADER_NAME = 'TMC Shader'
+SHADER_VERSION = 1
+
+SHADER_INPUTS = (
+        # Albedo texture which is "Colored with alpha" or "Alpha only"
+        ('Albedo Color', 'NodeSocketColor', (0, 0, 0, 1)),
+        ('Albedo Alpha', 'NodeSocketFloat', 0),
+        ('Alpha Only', 'NodeSocketFloat', 0),
+        # Albedo texture which is "Black and White" (Multiply) or "Light" (Linear Light)
+        ('Overlay Color', 'NodeSocketColor', (1, 1, 1, 1)),
+        ('Overlay', 'NodeSocketFloat', 0),
+        ('Overlay Mode', 'NodeSocketFloat', 0),
+        ('Alpha Blend Color', 'NodeSocketColor', (0, 0, 0, 1)),
+        ('Alpha Blend Alpha', 'NodeSocketFloat', 0),
+        ('Alpha Blend', 'NodeSocketFloat', 0),
+        ('Normal', 'NodeSocketVector', (0, 0, 0)),
+        ('Normal Map', 'NodeSocketFloat', 0),
+        ('Smoothness', 'NodeSocketColor', (0, 0, 0, 1)),
+        ('Smoothness Map', 'NodeSocketFloat', 0),
+        # MtrCol parameters
+        ('Specular', 'NodeSocketVector', (0, 0, 0)),
+        ('Emission', 'NodeSocketVector', (0, 0, 0)),
+        ('Metallic', 'NodeSocketFloat', 0),
+        ('IOR', 'NodeSocketFloat', 1.5),
+        ('Specular Tint', 'NodeSocketColor', (1, 1, 1, 1)),
+        ('Coat Weight', 'NodeSocketFloat', 0),
+        ('Coat Roughness', 'NodeSocketFloat', .03),
+        ('Coat Tint', 'NodeSocketColor', (1, 1, 1, 1)),
+        ('Sheen Weight', 'NodeSocketFloat', 0),
+        ('Sheen Roughness', 'NodeSocketFloat', .5),
+        ('Sheen Tint', 'NodeSocketColor', (1, 1, 1, 1)),
+)
+
+# Inputs A of ShaderNodeMix by data type, followed by B
+MIX_SOCKET_INDICES = { 'FLOAT': 2, 'VECTOR': 4, 'RGBA': 6 }
+
+def get_shader_node_group():
+    g = bpy.data.node_groups.get(SHADER_NAME)
+    if g and g.get('tmc_shader_version') == SHADER_VERSION:
+        return g
+    g = bpy.data.node_groups.new(SHADER_NAME, 'ShaderNodeTree')
+    g['tmc_shader_version'] = SHADER_VERSION
+    build_shader_node_group(g)
+    return g
+
+def build_shader_node_group(g):
+    nodes, links = g.nodes, g.links
+    for name, socket_type, default in SHADER_INPUTS:
+        s = g.interface.new_socket(name, in_out='INPUT', socket_type=socket_type)
+        s.default_value = default
+    g.interface.new_socket('BSDF', in_out='OUTPUT', socket_type='NodeSocketShader')
+
+    gin = nodes.new('NodeGroupInput')
+    gout = nodes.new('NodeGroupOutput')
+
+    def new(idname, **props):
+        n = nodes.new(idname)
+        for k, v in props.items():
+            setattr(n, k, v)
+        return n
+
+    # ShaderNodeMix has sockets for each data type, so we pick them by index.
+    def mix(data_type, factor, a, b, blend_type = 'MIX'):
+        n = new('ShaderNodeMix', data_type=data_type, blend_type=blend_type)
+        i = MIX_SOCKET_INDICES[data_type]
+        for s, x in zip((n.inputs[0], n.inputs[i], n.inputs[i+1]), (factor, a, b)):
+            if isinstance(x, bpy.types.NodeSocket):
+                links.new(x, s)
+            else:
+                s.default_value = x
+        return n.outputs[i//2 - 1]
+
+    I = gin.outputs
+
+    # "Alpha only" multiplies the color by its alpha, or the alpha blend texture instead
+    # of the color. "Colored with alpha" adds the alpha blend texture to the product.
+    ab = new('ShaderNodeMath', operation='MULTIPLY')
+    links.new(I['Alpha Blend Color'], ab.inputs[0])
+    links.new(I['Alpha Blend Alpha'], ab.inputs[1])
+    x = mix('VECTOR', I['Alpha Blend'], I['Albedo Color'], ab.outputs[0])
+    alpha_only = new('ShaderNodeVectorMath', operation='SCALE')
+    links.new(x, alpha_only.inputs['Vector'])
+    links.new(I['Albedo Alpha'], alpha_only.inputs['Scale'])
+    colored = new('ShaderNodeVectorMath', operation='MULTIPLY_ADD')
+    links.new(I['Albedo Color'], colored.inputs[0])
+    links.new(I['Albedo Alpha'], colored.inputs[1])
+    links.new(ab.outputs[0], colored.inputs[2])
+    albedo = mix('VECTOR', I['Alpha Only'], colored.outputs[0], alpha_only.outputs[0])
+    alpha = mix('FLOAT', I['Alpha Only'], I['Albedo Alpha'], alpha_only.outputs[0])
+
+    x = mix('VECTOR', I['Overlay Mode'],
+            mix('RGBA', 1, albedo, I['Overlay Color'], 'MULTIPLY'),
+            mix('RGBA', 1, albedo, I['Overlay Color'], 'LINEAR_LIGHT'))
+    albedo = mix('VECTOR', I['Overlay'], albedo, x)
+
+    mul_add = new('ShaderNodeVectorMath', operation='MULTIPLY_ADD')
+    links.new(albedo, mul_add.inputs[0])
+    links.new(I['Specular'], mul_add.inputs[1])
+    links.new(I['Emission'], mul_add.inputs[2])
+
+    gam = new('ShaderNodeGamma')
+    gam.inputs['Gamma'].default_value = 2.2
+    links.new(mul_add.outputs['Vector'], gam.inputs['Color'])
+
+    ao = new('ShaderNodeAmbientOcclusion')
+    links.new(gam.outputs['Color'], ao.inputs['Color'])
+
+    pbsdf = new('ShaderNodeBsdfPrincipled', distribution='GGX')
+    links.new(ao.outputs['Color'], pbsdf.inputs['Base Color'])
+    links.new(alpha, pbsdf.inputs['Alpha'])
+    for s in ('Metallic', 'IOR', 'Specular Tint', 'Coat Weight', 'Coat Roughness', 'Coat Tint',
+              'Sheen Weight', 'Sheen Roughness', 'Sheen Tint'):
+        links.new(I[s], pbsdf.inputs[s])
+
+    geo = new('ShaderNodeNewGeometry')
+    links.new(mix('VECTOR', I['Normal Map'], geo.outputs['Normal'], I['Normal']), pbsdf.inputs['Normal'])
+
+    inv = new('ShaderNodeVectorMath', operation='SUBTRACT')
+    inv.inputs[0].default_value = (1, 1, 1)
+    links.new(I['Smoothness'], inv.inputs[1])
+    grad = new('ShaderNodeTexGradient', gradient_type='LINEAR')
+    links.new(inv.outputs[0], grad.inputs['Vector'])
+    links.new(mix('FLOAT', I['Smoothness Map'], .5, grad.outputs['Color']), pbsdf.inputs['Roughness'])
+
+    links.new(pbsdf.outputs['BSDF'], gout.inputs['BSDF'])
+
+# It returns a new material and its shader node.
+def new_material(name):
+    m = bpy.data.materials.new(name)
+    m.use_nodes = True
+    nodes = m.node_tree.nodes
+    nodes.remove(nodes['Principled BSDF'])
+    shader = nodes.new('ShaderNodeGroup')
+    shader.node_tree = get_shader_node_group()
+    shader.name = SHADER_NAME
+    m.node_tree.links.new(shader.outputs['BSDF'], nodes['Material Output'].inputs['Surface'])
+    return m, shader
+
+# Materials are keyed by a hash of everything they are built from, i.e., ObjGeo
+# parameters, the MtrCol chunk, and hashes of images instead of texture indices.
+MATERIAL_KEY = 'tmc_material_key'
+
+def material_key(*params):
+    return hashlib.blake2b(repr((SHADER_VERSION, params)).encode(), digest_size=16).hexdigest()
+
+def find_materials():
+    return { m[MATERIAL_KEY]: m for m in bpy.data.materials if MATERIAL_KEY in m }
+
+# A copy gets other parameters later, so it doesn't keep the key of the original.
+def copy_material(material):
+    m = material.copy()
+    m.pop(MATERIAL_KEY, None)
+    return m
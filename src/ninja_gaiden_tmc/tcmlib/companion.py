@@ -0,0 +1,153 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+# A TMC is imported with its companion files, i.e., NGS2 needs a TMCL and NGS1 needs
+# a TMCL and a G1TG. We find the TMCL of an NGS2 TMC by the lhead in the TMC, which
+# is the head of the TMCL, and the ones of an NGS1 TMC by their file names.
+
+from __future__ import annotations
+
+from .parser import ParserError
+from . import ngs2
+
+from typing import NamedTuple
+import json
+import struct
+import mmap
+import os
+
+TMC_MAGIC = b'TMC'.ljust(8, b'\0')
+G1TG_MAGICS = (b'GT1G', b'G1TG')
+NGS1_TMCL_SUFFIXES = ('.tmcl',)
+NGS1_G1TG_SUFFIXES = ('.g1t', '.gt1', '.g1tg', '.tmcl2')
+HEAD_NBYTES = 16
+
+class TMCFileSet(NamedTuple):
+    game: str # 'ngs1' or 'ngs2'
+    tmc: str
+    # None if not found
+    tmcl: str | None
+    g1tg: str | None
+
+class FileSignature(NamedTuple):
+    mtime_ns: int
+    nbytes: int
+    kind: str # 'tmc', 'g1tg' or ''
+    # Only for TMC
+    game: str | None
+    # The lhead of an NGS2 TMC, or the first 12 bytes of another file, which is the
+    # lhead if the file is a TMCL.
+    lhead: tuple[int] | None
+
+def list_files(directory, recursive = False):
+    if recursive:
+        return sorted( os.path.join(d, f) for d, _, F in os.walk(directory) for f in F )
+    return sorted( e.path for e in os.scandir(directory) if e.is_file() )
+
+# It returns the game and the lhead of a TMC file, which is None for NGS1.
+def read_tmc_signature(data):
+    _, minor_ver = struct.unpack_from('< bb', data, 10)
+    if minor_ver == 0:
+        return 'ngs1', None
+    with ngs2.TMCParser(data) as tmc:
+        return 'ngs2', tmc.lhead
+
+# It reads only the head of a file, and the LHeader chunk of an NGS2 TMC.
+def read_file_signature(path, st):
+    with open(path, 'rb') as f:
+        h = f.read(HEAD_NBYTES)
+        if h[:8] == TMC_MAGIC:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return FileSignature(st.st_mtime_ns, st.st_size, 'tmc', *read_tmc_signature(data))
+    if h[:4] in G1TG_MAGICS:
+        # A G1TG is not larger than the file.
+        _, file_nbytes = struct.unpack_from('< 4sI', h, 4)
+        kind = (file_nbytes <= st.st_size and 'g1tg') or ''
+        return FileSignature(st.st_mtime_ns, st.st_size, kind, None, None)
+    lhead = (len(h) >= 12 and struct.unpack_from('< III', h)) or None
+    return FileSignature(st.st_mtime_ns, st.st_size, '', None, lhead)
+
+# The index keeps the signatures of files, which are read again only if the mtime or
+# the size of a file changes. It can be saved as JSON and loaded in later sessions.
+class CompanionIndex:
+    VERSION = 1
+
+    def __init__(self, signatures = None):
+        self.signatures = dict(signatures or {})
+        self._build_maps()
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path) as f:
+                x = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if x.get('version') != cls.VERSION:
+            return cls()
+        return cls({ p: FileSignature(*s[:4], s[4] and tuple(s[4])) for p, s in x['signatures'].items() })
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({ 'version': self.VERSION, 'signatures': self.signatures }, f)
+        os.replace(tmp, path)
+
+    # It returns the number of files read. Files which are not in files are dropped,
+    # and files which can't be read are skipped.
+    def update(self, files):
+        S = {}
+        n = 0
+        for p in files:
+            try:
+                st = os.stat(p)
+                s = self.signatures.get(p)
+                if not s or (s.mtime_ns, s.nbytes) != (st.st_mtime_ns, st.st_size):
+                    s = read_file_signature(p, st)
+                    n += 1
+            except (OSError, ValueError, ParserError, struct.error):
+                continue
+            S[p] = s
+        self.signatures = S
+        self._build_maps()
+        return n
+
+    def _build_maps(self):
+        # We prefer a companion in the same directory as the TMC.
+        self._by_lhead = by_lhead = {}
+        self._by_stem = by_stem = {}
+        for p, s in self.signatures.items():
+            d, f = os.path.split(p)
+            stem, suffix = os.path.splitext(f)
+            by_stem.setdefault((d, stem.lower()), {}).setdefault(suffix.lower(), p)
+            if s.kind != 'tmc' and s.lhead:
+                by_lhead.setdefault((d, s.lhead), p)
+                by_lhead.setdefault((None, s.lhead), p)
+
+    def find_tmcl(self, tmc_path):
+        s = self.signatures[tmc_path]
+        d, f = os.path.split(tmc_path)
+        if s.game == 'ngs2':
+            return s.lhead and (self._by_lhead.get((d, s.lhead)) or self._by_lhead.get((None, s.lhead)))
+        C = self._by_stem.get((d, os.path.splitext(f)[0].lower()), {})
+        return next(( C[x] for x in NGS1_TMCL_SUFFIXES if x in C ), None)
+
+    def find_g1tg(self, tmc_path):
+        d, f = os.path.split(tmc_path)
+        C = self._by_stem.get((d, os.path.splitext(f)[0].lower()), {})
+        return next(( C[x] for x in NGS1_G1TG_SUFFIXES
+                      if x in C and self.signatures[C[x]].kind == 'g1tg' ), None)
+
+    def file_sets(self):
+        S = []
+        for p, s in self.signatures.items():
+            if s.kind != 'tmc':
+                continue
+            g1tg = (s.game == 'ngs1' and self.find_g1tg(p)) or None
+            S.append(TMCFileSet(s.game, p, self.find_tmcl(p), g1tg))
+        return S
+
+def find_tmc_file_sets(files, index = None):
+    index = index or CompanionIndex()
+    index.update(files)
+    return index.file_sets()
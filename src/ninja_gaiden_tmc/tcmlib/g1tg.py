@@ -0,0 +1,146 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+# Ref: https://github.com/VitaSmith/gust_tools
+
+from __future__ import annotations
+
+from .parser import ParserError
+
+from typing import NamedTuple
+import struct
+
+class G1TGParser:
+    def __init__(self, data):
+        data = memoryview(data).toreadonly()
+
+        if data[:4] not in (b'GT1G', b'G1TG'):
+            data.release()
+            raise ParserError('No magic bytes "G1TG" found')
+
+        version, file_nbytes, header_nbytes, texture_count = struct.unpack_from('< 4sIII', data, 4)
+        self.metadata = G1TGMetaData(version, texture_count)
+        self._data = data = data[:file_nbytes or data.nbytes]
+
+        O = struct.unpack_from(f'< {texture_count}I', data, header_nbytes)
+        self._sub_container = D = data[header_nbytes:]
+        E = ( *O[1:], D.nbytes )
+        self.chunks = tuple( G1TGParser._make_chunk(D[o:p]) for o, p in zip(O, E) )
+
+    @staticmethod
+    def _make_chunk(c):
+        x = struct.unpack_from('< BBBB', c)
+        mipmap_count = x[0] >> 4
+        texture_format = x[1]
+        height = 1 << (x[2] >> 4)
+        width = 1 << (x[2] & 0xf)
+        flags, = struct.unpack_from('> I', c, 4)
+        o = 8
+        # Some textures have an extended header which may have dimensions that are not
+        # a power of two.
+        if flags & 0x1000_0000 and len(c) >= 0xc + o:
+            n, = struct.unpack_from('< I', c, o)
+            if 0xc <= n <= 0x14:
+                if n >= 0x14:
+                    width, height = struct.unpack_from('< II', c, o + 0xc)
+                o += n
+        data = c[o:]
+        return G1TGTexture(texture_format, width, height, mipmap_count, flags, data,
+                           G1TGParser._make_mipmaps(data, texture_format, width, height, mipmap_count))
+
+    @staticmethod
+    def _make_mipmaps(data, texture_format, width, height, mipmap_count):
+        try:
+            f = G1TG_TEXTURE_FORMATS[texture_format]
+        except KeyError:
+            return ()
+        M = []
+        o = 0
+        for i in range(max(mipmap_count, 1)):
+            w, h = max(width >> i, 1), max(height >> i, 1)
+            p = o + f.level_nbytes(w, h)
+            if p > data.nbytes:
+                break
+            M.append(data[o:p])
+            o = p
+        return tuple(M)
+
+    def close(self):
+        for c in self.chunks:
+            for m in c.mipmaps:
+                m.release()
+            c.data.release()
+        self._sub_container.release()
+        self._data.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class G1TGMetaData(NamedTuple):
+    version: bytes
+    texture_count: int
+
+class G1TGTexture(NamedTuple):
+    texture_format: int
+    width: int
+    height: int
+    mipmap_count: int
+    flags: int
+    # All levels of the texture
+    data: memoryview
+    # Each level of the texture, if the format is known
+    mipmaps: tuple[memoryview]
+
+class G1TGTextureFormat(NamedTuple):
+    four_cc: bytes
+    # Bytes per 4x4 block for block compressed formats, otherwise 0
+    block_nbytes: int
+
+    def level_nbytes(self, width, height):
+        if self.block_nbytes:
+            return ((width+3)//4) * ((height+3)//4) * self.block_nbytes
+        return width * height * 4
+
+G1TG_TEXTURE_FORMATS = {
+        0x01: G1TGTextureFormat(b'GRGB', 0), # ARGB8888
+        0x06: G1TGTextureFormat(b'DXT1', 8),
+        0x07: G1TGTextureFormat(b'DXT3', 16),
+        0x08: G1TGTextureFormat(b'DXT5', 16),
+        0x59: G1TGTextureFormat(b'DXT1', 8),
+        0x5a: G1TGTextureFormat(b'DXT3', 16),
+        0x5b: G1TGTextureFormat(b'DXT5', 16),
+}
+
+def dds_header(texture):
+    t = texture
+    try:
+        f = G1TG_TEXTURE_FORMATS[t.texture_format]
+    except KeyError:
+        raise ParserError(f'Not supported G1TG texture format: {t.texture_format:#x}') from None
+
+    bit_count = rmask = gmask = bmask = 0
+    if f.block_nbytes:
+        flags = 4
+    else:
+        flags = 0x40
+        bit_count = 32
+        rmask = 0x00ff0000
+        gmask = 0xff00ff00
+        bmask = 0x000000ff
+
+    return b'DDS ' + struct.pack(
+            '< IIII III 44sII 4sIII IIII III',
+            124, 0xA1007, t.height, t.width,
+            f.level_nbytes(t.width, t.height), 0, t.mipmap_count,
+            44*b'', 32, flags,
+            f.four_cc, bit_count, rmask, gmask,
+            bmask, 0, 0x401008, 0,
+            0, 0, 0)
+
+# It returns the DDS file of a texture, which is a copy of the texture data after
+# the header.
+def dds_bytes(texture):
+    return dds_header(texture) + texture.data
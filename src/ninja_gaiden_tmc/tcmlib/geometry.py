@@ -0,0 +1,152 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+from __future__ import annotations
+
+from .parser import ParserError
+from .ngs2.parser import D3DDECLTYPE, D3DDECLUSAGE
+from .vertex import decode_vertices
+from .topology import view_indices, triangulate
+from .skin import ubyte4_influences, float2_influences
+from .instrument import phase
+
+from contextlib import nullcontext
+from typing import NamedTuple
+import numpy as np
+
+# The geometry of an ObjGeo, which is everything a mesh needs apart from Blender
+# datablocks. Vertices of all GeoDecl chunks are concatenated in order.
+class ObjGeoGeometry(NamedTuple):
+    # Y-up
+    positions: np.ndarray
+    normals: np.ndarray
+    triangles: np.ndarray
+    # The index of the ObjGeo chunk of each triangle
+    material_indices: np.ndarray
+    # Four UV layers of shape (4, vertex count, 2), whose V is already flipped
+    uvs: np.ndarray
+    # The vertex count of each GeoDecl chunk
+    vertex_counts: np.ndarray
+    # Influences of blend weights, whose groups are blend indices
+    influence_vertices: np.ndarray
+    influence_groups: np.ndarray
+    influence_weights: np.ndarray
+
+# NGS2 draws triangle strips, and NGS1 draws triangle lists. Blend weights are
+# UBYTE4 pairs with blend indices in NGS2, or FLOAT2 in NGS1.
+def decode_objgeo(tmc, objgeo_index, strip):
+    objgeo = tmc.mdlgeo.chunks[objgeo_index]
+    C = objgeo.sub_container.chunks
+    vertex_count = sum( c.vertex_count for c in C )
+    P, N = [np.empty((0, 3), np.float32)], [np.empty((0, 3), np.float32)]
+    T, MI = [np.empty((0, 3), np.int32)], [np.empty(0, np.int32)]
+    UV = np.zeros((4, vertex_count, 2), np.float32)
+    X = ([np.empty(0, np.int32)], [np.empty(0, np.int32)], [np.empty(0, np.float32)])
+    v0 = 0
+    for geodecl_chunk_index, c in enumerate(C):
+        VE = c.vertex_elements
+        vbuf = tmc.vtxlay.chunks[c.vertex_buffer_index]
+
+        # We assume that the first element is of D3DDECLUSAGE.POSITION.
+        e = VE[0]
+        if e.d3d_decl_type != D3DDECLTYPE.FLOAT3:
+            raise ParserError(f'Not supported vert decl type for position: {repr(e.d3d_decl_type)}')
+
+        with phase('objgeo.vertices', vertices=c.vertex_count):
+            V = decode_vertices(vbuf, c)
+        P.append(V['position0'])
+        N.append(np.zeros((c.vertex_count, 3), np.float32))
+
+        D = tuple( d for d in objgeo.chunks if d.geodecl_chunk_index == geodecl_chunk_index )
+        with phase('objgeo.faces', indices=sum( d.index_count for d in D )):
+            ibuf = view_indices(tmc.idxlay.chunks[c.index_buffer_index], c.vertex_count)
+            Y, S = triangulate(ibuf, tuple( (d.first_index_index, d.index_count) for d in D ),
+                               c.vertex_count, strip)
+        T.append(Y + v0)
+        MI.append(np.array(tuple( d.objgeo_chunk_index for d in D ), np.int32)[S])
+
+        BW = BI = ()
+        for e in VE[1:]:
+            t = e.d3d_decl_type
+            x = f'{e.usage.name.lower()}{e.usage_index}'
+            match e.usage:
+                case D3DDECLUSAGE.BLENDWEIGHT:
+                    # The type of NGS2 is not actually UDEC3, but UBYTE4.
+                    if t != D3DDECLTYPE.UDEC3 and t != D3DDECLTYPE.FLOAT2:
+                        raise ParserError(f'Not supported vert decl type for blendweight: {repr(t)}')
+                    BW = V[x]
+                case D3DDECLUSAGE.BLENDINDICES:
+                    if t != D3DDECLTYPE.UBYTE4:
+                        raise ParserError(f'Not supported vert decl type for blendindices: {repr(t)}')
+                    BI = V[x]
+                case D3DDECLUSAGE.NORMAL:
+                    if t != D3DDECLTYPE.FLOAT3:
+                        raise ParserError(f'Not supported vert decl type for normal: {repr(t)}')
+                    N[-1] = V[x]
+                case D3DDECLUSAGE.TEXCOORD:
+                    # They are not "short", but actually "float16".
+                    if t != D3DDECLTYPE.USHORT2N and t != D3DDECLTYPE.SHORT4N:
+                        raise ParserError(f'Not supported vert decl type for texcoord: {repr(t)}')
+                    if e.usage_index > 1:
+                        raise ParserError(f'Not supported usage index for texcoord: {repr(x)}')
+
+                    i = 2*e.usage_index
+                    Y = V[x]
+                    for j in range(0, Y.shape[1], 2):
+                        UV[i + j//2, v0:v0+c.vertex_count, 0] = Y[:, j]
+                        UV[i + j//2, v0:v0+c.vertex_count, 1] = 1 - Y[:, j+1]
+                case D3DDECLUSAGE.TANGENT:
+                    pass
+                case D3DDECLUSAGE.COLOR:
+                    pass
+                case x:
+                    raise ParserError(f'Not supported vert decl usage: {repr(x)}')
+
+        with phase('objgeo.weights'):
+            if len(BI) and len(BW):
+                Y = ubyte4_influences(BI, BW, v0)
+            elif len(BW) and BW.dtype == np.float32:
+                Y = float2_influences(BW, v0)
+            else:
+                Y = ()
+        for x, y in zip(X, Y):
+            x.append(y)
+        v0 += c.vertex_count
+
+    return ObjGeoGeometry(np.concatenate(P), np.concatenate(N), np.concatenate(T), np.concatenate(MI), UV,
+                          np.array([ c.vertex_count for c in C ], np.int32), *map(np.concatenate, X))
+
+# It returns an upper bound of the number of bytes of the arrays of decode_objgeo,
+# from the counts in the chunks only. Every array may be padded by align bytes.
+def objgeo_geometry_nbytes(tmc, objgeo_index, align = 16):
+    objgeo = tmc.mdlgeo.chunks[objgeo_index]
+    v = sum( c.vertex_count for c in objgeo.sub_container.chunks )
+    i = sum( d.index_count for d in objgeo.chunks )
+    # Positions, normals and UVs, and up to four influences per vertex. Each index
+    # makes at most one triangle and its material index.
+    return (12 + 12 + 32 + 4*12)*v + (12 + 4)*i + 4*len(objgeo.sub_container.chunks) \
+           + align*len(ObjGeoGeometry._fields)
+
+# It decodes ObjGeo chunks on demand in this process. decode returns a context
+# manager for the geometry, like the decoders of tcmlib.pool. prefetch tells the
+# order in which ObjGeo chunks will be decoded, which only matters to the others.
+class GeometryDecoder:
+    def __init__(self, tmc, strip):
+        self.tmc = tmc
+        self.strip = strip
+
+    def prefetch(self, order):
+        pass
+
+    def decode(self, objgeo_index):
+        with phase('objgeo.decode'):
+            return nullcontext(decode_objgeo(self.tmc, objgeo_index, self.strip))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,106 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+from .parser import ParserError
+
+import numpy as np
+
+# Matrices in TMC are for row vectors, i.e., the global matrix of a node is its local
+# matrix multiplied by the global matrix of its parent from the right.
+
+# parents has the index of the parent of each node, or -1 for a root. It returns the
+# order in which every parent comes before its children, and the depth of each node.
+def hierarchy_order(parents):
+    parents = np.asarray(parents, np.intp)
+    depth = np.zeros(len(parents), np.intp)
+    P = parents.copy()
+    for _ in range(len(parents)):
+        J = P > -1
+        if not J.any():
+            break
+        depth[J] += 1
+        P[J] = parents[P[J]]
+    else:
+        if len(parents) and (P > -1).any():
+            raise ParserError('HieLay has a cycle')
+    return np.argsort(depth, kind='stable'), depth
+
+# It computes all global matrices level by level, so each level is a single batched
+# matrix multiplication which reuses the results of the parents.
+def global_matrices(matrices, parents):
+    M = np.asarray(matrices, np.float64).reshape(-1, 4, 4)
+    parents = np.asarray(parents, np.intp)
+    order, depth = hierarchy_order(parents)
+    G = np.empty_like(M)
+    B = np.searchsorted(depth[order], np.arange(depth.max(initial=0) + 2))
+    for d, (b, e) in enumerate(zip(B[:-1], B[1:])):
+        I = order[b:e]
+        G[I] = M[I] if d == 0 else M[I] @ G[parents[I]]
+    return G
+
+# global_matrices is consistent if every one is its local matrix multiplied by the
+# one of its parent, which takes a single batched multiplication to check.
+def is_consistent(global_matrices, matrices, parents, rtol = 1e-4, atol = 1e-4):
+    G = np.asarray(global_matrices, np.float64).reshape(-1, 4, 4)
+    M = np.asarray(matrices, np.float64).reshape(-1, 4, 4)
+    parents = np.asarray(parents, np.intp)
+    if len(G) != len(M):
+        return False
+    X = M.copy()
+    J = parents > -1
+    X[J] = M[J] @ G[parents[J]]
+    return bool(np.allclose(G, X, rtol, atol))
+
+# It returns the global matrices of HieLay chunks, which are taken from GlblMtx
+# chunks as they are if they are consistent with HieLay.
+def hielay_global_matrices(hielay_chunks, glblmtx_chunks = ()):
+    M = np.array([ c.matrix for c in hielay_chunks ], np.float64).reshape(-1, 4, 4)
+    P = np.array([ c.parent for c in hielay_chunks ], np.intp)
+    if len(glblmtx_chunks) == len(M):
+        G = np.array(glblmtx_chunks, np.float64).reshape(-1, 4, 4)
+        if is_consistent(G, M, P):
+            return G
+    return global_matrices(M, P)
+
+# It places the tail of each bone by its node, where heads are the global positions of
+# the nodes and is_mot tells which nodes are of OBJ_TYPE.MOT, as follows:
+# - A bone with MOT children points at the mean of their heads.
+# - Otherwise, a bone points in the direction of its parent bone, as long as the
+#   parent if it's MOT, or min_length if it's not.
+# - A bone shorter than min_length points in the direction of its parent bone by
+#   min_length. A root bone has root_tail instead of a parent direction.
+# Bones are placed level by level, since each needs the final bone of its parent.
+def bone_tails(heads, parents, is_mot, min_length = .01, root_tail = (0, .01, 0)):
+    H = np.asarray(heads, np.float64).reshape(-1, 3)
+    parents = np.asarray(parents, np.intp)
+    is_mot = np.asarray(is_mot, bool)
+    order, depth = hierarchy_order(parents)
+
+    J = is_mot & (parents > -1)
+    S = np.zeros_like(H)
+    N = np.zeros(len(H))
+    np.add.at(S, parents[J], H[J])
+    np.add.at(N, parents[J], 1)
+
+    T = np.empty_like(H)
+    # Length and direction of each bone
+    L = np.zeros(len(H))
+    D = np.zeros_like(H)
+    B = np.searchsorted(depth[order], np.arange(depth.max(initial=0) + 2))
+    for b, e in zip(B[:-1], B[1:]):
+        I = order[b:e]
+        h = H[I]
+        p = parents[I]
+        has_parent = (p > -1)[:, None]
+        pd, pl = D[p], L[p]
+        x = np.where(is_mot[I], pl, min_length)[:, None]
+        n = N[I][:, None]
+        t = np.where(n > 0, S[I] / np.maximum(n, 1), np.where(has_parent, h + x*pd, root_tail))
+        short = np.linalg.norm(t - h, axis=1) < min_length
+        t[short] = np.where(has_parent, h + min_length*pd, root_tail)[short]
+        T[I] = t
+        v = t - h
+        L[I] = l = np.linalg.norm(v, axis=1)
+        # A zero-length bone points to +Y like Blender does.
+        D[I] = np.where(l[:, None] > 0, v / np.maximum(l, 1e-38)[:, None], (0, 1, 0))
+    return T
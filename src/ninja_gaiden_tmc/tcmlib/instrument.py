@@ -0,0 +1,154 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+# Imports are divided into named phases, which are measured only while a Profiler
+# is active. Otherwise phase costs a global lookup. A phase includes the phases
+# nested in it, e.g. "objgeo.decode" includes "objgeo.vertices".
+#
+#   with Profiler() as p:
+#       import_file(...)
+#   p.write_json('profile.json')
+#   p.write_chrome_trace('trace.json')
+
+from contextlib import nullcontext
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_current = None
+_null = nullcontext()
+
+# counts are added up over calls, e.g. vertices=n.
+def phase(name, **counts):
+    p = _current
+    if p is None:
+        return _null
+    return p.phase(name, counts)
+
+# It adds counts to the innermost phase, for counts known only inside it.
+def add_counts(**counts):
+    p = _current
+    if p is not None and p._frames:
+        C = p._frames[-1].counts
+        for k, v in counts.items():
+            C[k] = C.get(k, 0) + v
+
+class PhaseStats:
+    def __init__(self):
+        self.calls = 0
+        self.wall_s = 0.
+        # The peak of memory allocated by Python and NumPy above the memory at the
+        # start of a call
+        self.peak_bytes = 0
+        self.counts = {}
+
+    def to_dict(self):
+        return { 'calls': self.calls, 'wall_s': self.wall_s, 'peak_bytes': self.peak_bytes, **self.counts }
+
+class _Frame:
+    def __init__(self, name, counts, memory):
+        self.name = name
+        self.counts = dict(counts)
+        self.memory = memory
+        # The highest peak of tracemalloc seen in this phase
+        self.peak = memory
+
+class _Phase:
+    def __init__(self, profiler, name, counts):
+        self.profiler = profiler
+        self.name = name
+        self.counts = counts
+
+    def __enter__(self):
+        P = self.profiler
+        memory = 0
+        if tracemalloc.is_tracing():
+            memory, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for this phase, so the outer one keeps what it has seen.
+            if P._frames:
+                P._frames[-1].peak = max(P._frames[-1].peak, peak)
+            tracemalloc.reset_peak()
+        P._frames.append(_Frame(self.name, self.counts, memory))
+        self.t = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        t = time.perf_counter()
+        P = self.profiler
+        f = P._frames.pop()
+        if tracemalloc.is_tracing():
+            f.peak = max(f.peak, tracemalloc.get_traced_memory()[1])
+            if P._frames:
+                P._frames[-1].peak = max(P._frames[-1].peak, f.peak)
+        P._record(f, self.t, t)
+
+class Profiler:
+    def __init__(self, memory = True):
+        self.memory = memory
+        self.stats = {}
+        # Trace events in the Chrome trace event format
+        self.events = []
+        self._frames = []
+        self._outer = None
+        self._started_tracing = False
+        # A profiler can be entered many times, e.g. once per timer event of a modal
+        # operator. wall_s is the time inside it, and trace events are from _t0.
+        self._t0 = self._entered = time.perf_counter()
+        self.wall_s = 0.
+
+    def phase(self, name, counts = {}):
+        return _Phase(self, name, counts)
+
+    def __enter__(self):
+        global _current
+        self._outer, _current = _current, self
+        self._entered = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _current
+        _current = self._outer
+        self.wall_s += time.perf_counter() - self._entered
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _record(self, frame, t, t_end):
+        s = self.stats.get(frame.name)
+        if s is None:
+            s = self.stats[frame.name] = PhaseStats()
+        s.calls += 1
+        s.wall_s += t_end - t
+        s.peak_bytes = max(s.peak_bytes, frame.peak - frame.memory)
+        for k, v in frame.counts.items():
+            s.counts[k] = s.counts.get(k, 0) + v
+        self.events.append({
+                'name': frame.name, 'cat': 'import', 'ph': 'X',
+                'ts': (t - self._t0) * 1e6, 'dur': (t_end - t) * 1e6,
+                'pid': os.getpid(), 'tid': threading.get_ident(),
+                'args': { **frame.counts, 'peak_bytes': frame.peak - frame.memory },
+        })
+
+    def summary(self):
+        return { 'wall_s': self.wall_s, 'phases': { k: s.to_dict() for k, s in self.stats.items() } }
+
+    # Phases sorted by time, which fit in an operator report.
+    def report_lines(self, limit = 10):
+        L = []
+        for k, s in sorted(self.stats.items(), key=lambda x: -x[1].wall_s)[:limit]:
+            C = ''.join( f', {v} {c}' for c, v in s.counts.items() )
+            L.append(f'{k}: {1e3*s.wall_s:.1f} ms in {s.calls} calls, peak {s.peak_bytes/2**20:.1f} MiB{C}')
+        return L
+
+    # meta is written with the summary, e.g. the file and the version.
+    def write_json(self, path, **meta):
+        with open(path, 'w') as f:
+            json.dump({ **meta, **self.summary() }, f, indent=1)
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump({ 'traceEvents': self.events, 'displayTimeUnit': 'ms' }, f)
@@ -6,56 +6,75 @@ from __future__ import annotations
 from ..parser import ContainerParser
 
 from typing import NamedTuple
+from functools import cached_property
 from enum import IntEnum
 from operator import indexOf
 import struct
 
 class TMCParser(ContainerParser):
+    # Sub-parsers are built on first access of the corresponding attribute, so
+    # opening a TMC only costs parsing its header. An attribute whose chunk is
+    # absent raises AttributeError, as if it did not exist.
     def __init__(self, data, ldata = b''):
         super().__init__(b'TMC', data)
         a = struct.unpack_from('< HH12x 16x 16s', self._metadata)
         self.metadata = TMCMetaData(*a[:-1], a[-1].partition(b'\0')[0])
 
-        if ldata:
-            ldata = memoryview(ldata)
-            self.vtxlay = v = VtxLayParser(ldata)
-            self.idxlay = IdxLayParser(ldata[v._data.nbytes:])
-            ldata.release()
-
         o = 0x60
         p = o+4*len(self._chunks)
         tbl = self._metadata[o:p].cast('I')
-
-        for t, c in zip(tbl, self._chunks):
-            if not c:
-                continue
-
-            match t:
-                case 0x8000_0001:
-                    self.mdlgeo = MdlGeoParser(c)
-                case 0x8000_0002:
-                    #self.ttg = TTGParser(c)
-                    pass
-                case 0x8000_0005:
-                    self.mtrcol = MtrColParser(c)
-                case 0x8000_0006:
-                    self.mdlinfo = MdlInfoParser(c)
-                case 0x8000_0010:
-                    self.hielay = HieLayParser(c)
-                case 0x0000_0001:
-                    self.obj_type_info = OBJ_TYPE_INFOParser(c)
-                case 0x0000_0015:
-                    self.extmcol = EXTMCOLParser(c)
+        self._typed_chunks = { t: c for t, c in zip(tbl, self._chunks) if c }
+        self._tmcl = ldata
+
+    def _chunk(self, t):
+        try:
+            return self._typed_chunks[t]
+        except KeyError:
+            raise AttributeError(f'No chunk of type {t:#x} in TMC') from None
+
+    @cached_property
+    def vtxlay(self):
+        if not self._tmcl:
+            raise AttributeError('No TMCL was passed to TMC')
+        return VtxLayParser(self._tmcl)
+
+    @cached_property
+    def idxlay(self):
+        # IdxLay immediately follows VtxLay in TMCL.
+        with memoryview(self._tmcl) as ldata:
+            return IdxLayParser(ldata[self.vtxlay._data.nbytes:])
+
+    @cached_property
+    def mdlgeo(self):
+        return MdlGeoParser(self._chunk(0x8000_0001))
+
+    @cached_property
+    def mtrcol(self):
+        return MtrColParser(self._chunk(0x8000_0005))
+
+    @cached_property
+    def mdlinfo(self):
+        return MdlInfoParser(self._chunk(0x8000_0006))
+
+    @cached_property
+    def hielay(self):
+        return HieLayParser(self._chunk(0x8000_0010))
+
+    @cached_property
+    def obj_type_info(self):
+        return OBJ_TYPE_INFOParser(self._chunk(0x0000_0001))
+
+    @cached_property
+    def extmcol(self):
+        return EXTMCOLParser(self._chunk(0x0000_0015))
 
     def close(self):
+        # Only the sub-parsers that have been built are released.
+        for k in ('vtxlay', 'idxlay', 'mdlgeo', 'mtrcol', 'mdlinfo', 'hielay', 'extmcol'):
+            if x := self.__dict__.pop(k, None): x.close()
+        self._typed_chunks.clear()
+        self._tmcl = None
         super().close()
-        if x := getattr(self, 'vtxlay', None): x.close()
-        if x := getattr(self, 'idxlay', None): x.close()
-        self.mdlgeo.close()
-        self.mtrcol.close()
-        self.mdlinfo.close()
-        self.hielay.close()
-        if x := getattr(self, 'extmcol', None): x.close()
 
 class TMCMetaData(NamedTuple):
     unknown0x0: int
@@ -3,14 +3,18 @@
 
 from __future__ import annotations
 
-from ..parser import ContainerParser
+from ..parser import ContainerParser, ParserError
 
 from typing import NamedTuple
+from functools import cached_property
 from enum import IntEnum
 from operator import indexOf
 import struct
 
 class TMCParser(ContainerParser):
+    # Sub-parsers are built on first access of the corresponding attribute, so
+    # opening a TMC only costs parsing its header. An attribute whose chunk is
+    # absent raises AttributeError, as if it did not exist.
     def __init__(self, data, ldata = b''):
         super().__init__(b'TMC', data)
 
@@ -20,60 +24,93 @@ class TMCParser(ContainerParser):
         o = 0xc0
         p = o+4*len(self._chunks)
         tbl = self._metadata[o:p].cast('I')
-        i = indexOf(tbl, 0x8000_0020)
-        self.lheader = LHeaderParser(self._chunks[i], ldata)
-
-        for t, c in zip(tbl, self._chunks):
-            if not c:
-                continue
-
-            match t:
-                case 0x8000_0001:
-                    self.mdlgeo = MdlGeoParser(c)
-                case 0x8000_0002:
-                    self.ttdm = TTDMParser(c, ldata and self.lheader.ttdl)
-                case 0x8000_0003:
-                    self.vtxlay = VtxLayParser(c, ldata and self.lheader.vtxlay)
-                case 0x8000_0004:
-                    self.idxlay = IdxLayParser(c, ldata and self.lheader.idxlay)
-                case 0x8000_0005:
-                    self.mtrcol = MtrColParser(c)
-                case 0x8000_0006:
-                    self.mdlinfo = MdlInfoParser(c)
-                case 0x8000_0010:
-                    self.hielay = HieLayParser(c)
-                case 0x8000_0030:
-                    self.nodelay = NodeLayParser(c)
-                case 0x8000_0040:
-                    self.glblmtx = GlblMtxParser(c)
-                case 0x8000_0050:
-                    self.bnofsmtx = BnOfsMtxParser(c)
-                case 0x0000_0000:
-                    obj_type_info_head = c
-                case 0x0000_0001:
-                    obj_type_info = c
-                case 0x0000_0005:
-                    self.mtrlchng = MTRLCHNGParser(c)
-
+        self._typed_chunks = { t: c for t, c in zip(tbl, self._chunks) if c }
+        self._lheader_chunk = self._chunks[indexOf(tbl, 0x8000_0020)]
+        self._tmcl = ldata
+
+        # LHeader is parsed lazily, but a wrong TMCL must fail here, before any
+        # importer starts building the model.
+        if ldata and self.lhead:
+            lhead = struct.unpack_from('< III', ldata)
+            if lhead != self.lhead:
+                self.close()
+                raise ParserError(f'Lheads in LHeader differ: {self.lhead} != {lhead}')
+
+    def _chunk(self, t):
         try:
-            self.obj_type_info = OBJ_TYPE_INFOParser(obj_type_info_head, obj_type_info)
-        except NameError:
-            pass
+            return self._typed_chunks[t]
+        except KeyError:
+            raise AttributeError(f'No chunk of type {t:#x} in TMC') from None
+
+    @cached_property
+    def lheader(self):
+        return LHeaderParser(self._lheader_chunk, self._tmcl)
+
+    # The head of the TMCL which this TMC needs, or None if it needs no TMCL. It can
+    # be read without any TMCL to find the TMCL of a TMC.
+    @cached_property
+    def lhead(self):
+        c = self._lheader_chunk
+        if struct.unpack_from('< bbI', c, 10) != (1, 1, 0x50):
+            return None
+        return struct.unpack_from('< III', c, 0x40)
+
+    @cached_property
+    def mdlgeo(self):
+        return MdlGeoParser(self._chunk(0x8000_0001))
+
+    @cached_property
+    def ttdm(self):
+        return TTDMParser(self._chunk(0x8000_0002), self._tmcl and self.lheader.ttdl)
+
+    @cached_property
+    def vtxlay(self):
+        return VtxLayParser(self._chunk(0x8000_0003), self._tmcl and self.lheader.vtxlay)
+
+    @cached_property
+    def idxlay(self):
+        return IdxLayParser(self._chunk(0x8000_0004), self._tmcl and self.lheader.idxlay)
+
+    @cached_property
+    def mtrcol(self):
+        return MtrColParser(self._chunk(0x8000_0005))
+
+    @cached_property
+    def mdlinfo(self):
+        return MdlInfoParser(self._chunk(0x8000_0006))
+
+    @cached_property
+    def hielay(self):
+        return HieLayParser(self._chunk(0x8000_0010))
+
+    @cached_property
+    def nodelay(self):
+        return NodeLayParser(self._chunk(0x8000_0030))
+
+    @cached_property
+    def glblmtx(self):
+        return GlblMtxParser(self._chunk(0x8000_0040))
+
+    @cached_property
+    def bnofsmtx(self):
+        return BnOfsMtxParser(self._chunk(0x8000_0050))
+
+    @cached_property
+    def obj_type_info(self):
+        return OBJ_TYPE_INFOParser(self._chunk(0x0000_0000), self._chunk(0x0000_0001))
+
+    @cached_property
+    def mtrlchng(self):
+        return MTRLCHNGParser(self._chunk(0x0000_0005))
 
     def close(self):
+        # Only the sub-parsers that have been built are released.
+        for k in ('lheader', 'mdlgeo', 'ttdm', 'vtxlay', 'idxlay', 'mtrcol', 'mdlinfo',
+                  'hielay', 'nodelay', 'glblmtx', 'bnofsmtx', 'mtrlchng'):
+            if x := self.__dict__.pop(k, None): x.close()
+        self._typed_chunks.clear()
+        self._lheader_chunk = self._tmcl = None
         super().close()
-        self.lheader.close()
-        self.mdlgeo.close()
-        self.ttdm.close()
-        self.vtxlay.close()
-        self.idxlay.close()
-        self.mtrcol.close()
-        self.mdlinfo.close()
-        self.hielay.close()
-        self.nodelay.close()
-        self.glblmtx.close()
-        self.bnofsmtx.close()
-        if x := getattr(self, 'mtrlchng', None): x.close()
 
 class TMCMetaData(NamedTuple):
     unknown0x0: int
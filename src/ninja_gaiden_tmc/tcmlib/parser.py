@@ -61,16 +61,21 @@ class ContainerParser:
             yield from ( data[o:o+n] for o, n in zip(offset_table, size_table) )
             return
 
-        for i, o in enumerate(offset_table):
-            if not o:
-                yield data[:0]
-                continue
-            for p in offset_table[i+1:]:
-                if p:
-                    yield data[o:p]
-                    break
-            else:
-                yield data[o:]
+        E = ContainerParser._resolve_chunk_ends(offset_table, data.nbytes)
+        yield from ( data[o:p] for o, p in zip(offset_table, E) )
+
+    @staticmethod
+    def _resolve_chunk_ends(offset_table, end):
+        # A chunk ends where the next non-zero offset in the table begins, and the
+        # last one ends at the end of the data. Zero offsets mark absent chunks, so
+        # they end where they begin. We resolve all of them in one backward pass
+        # instead of scanning forward from every offset.
+        E = len(offset_table) * [0]
+        for i in range(len(offset_table)-1, -1, -1):
+            if o := offset_table[i]:
+                E[i] = end
+                end = o
+        return E
 
     def close(self):
         for c in self._chunks:
@@ -0,0 +1,193 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+# ObjGeo chunks are decoded by worker processes, which map the same TMC and TMCL
+# files. The main process allocates a shared memory block for each ObjGeo, and a
+# worker writes the arrays into it, so they are handed over without pickling. The
+# main process owns every block, which is gone as soon as it's consumed.
+
+from .parser import ParserError
+from .geometry import ObjGeoGeometry, decode_objgeo, objgeo_geometry_nbytes
+from .instrument import phase
+from . import ngs1, ngs2
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from collections import deque
+import numpy as np
+import mmap
+import os
+import traceback
+
+ALIGN = 16
+
+# Workers are spawned, since forking Blender is not safe. They can't import the
+# add-on, whose __init__ needs bpy, so they load tcmlib by itself under the same
+# name, with empty modules standing in for the packages above it. Functions of
+# tcmlib are then pickled by name as usual.
+BOOTSTRAP = '''
+import importlib.util, sys, types
+P = name.split('.')
+for i in range(1, len(P)):
+    n = '.'.join(P[:i])
+    if n not in sys.modules:
+        sys.modules[n] = m = types.ModuleType(n)
+        m.__path__ = []
+spec = importlib.util.spec_from_file_location(name, path + '/__init__.py', submodule_search_locations=[path])
+sys.modules[name] = m = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(m)
+'''
+
+class DecodePool:
+    def __init__(self, max_workers = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+                self.max_workers, get_context('spawn'), initializer=exec,
+                initargs=(BOOTSTRAP, { 'name': __package__, 'path': os.path.dirname(__file__) }))
+
+    # Only a few ObjGeo chunks per worker are in flight at once, which bounds the
+    # shared memory.
+    def geometry_decoder(self, game, tmc_path, tmcl_path, tmc):
+        return SharedGeometryDecoder(self._executor, game, tmc_path, tmcl_path, tmc, 4*self.max_workers)
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# decode returns a context manager for the geometry, whose arrays are views of the
+# shared memory and must not be used after it exits.
+class SharedGeometryDecoder:
+    def __init__(self, executor, game, tmc_path, tmcl_path, tmc, window):
+        self._executor = executor
+        self._args = (game, os.path.abspath(tmc_path), os.path.abspath(tmcl_path))
+        self._tmc = tmc
+        self._queue = deque()
+        self._window = window
+        self._pending = {}
+
+    # ObjGeo chunks are submitted in order, ahead of decode.
+    def prefetch(self, order):
+        self._queue.extend(order)
+        self._fill()
+
+    def _submit(self, objgeo_index):
+        shm = SharedMemory(create=True, size=max(objgeo_geometry_nbytes(self._tmc, objgeo_index, ALIGN), 1))
+        f = self._executor.submit(decode_objgeo_into, shm.name, *self._args, objgeo_index)
+        self._pending[objgeo_index] = SharedGeometry(shm, f)
+
+    def _fill(self):
+        while self._queue and len(self._pending) < self._window:
+            i = self._queue.popleft()
+            if i not in self._pending:
+                self._submit(i)
+
+    def decode(self, objgeo_index):
+        if objgeo_index not in self._pending:
+            self._submit(objgeo_index)
+        g = self._pending.pop(objgeo_index)
+        self._fill()
+        return g
+
+    def close(self):
+        self._queue.clear()
+        for g in self._pending.values():
+            g.cancel()
+        self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class SharedGeometry:
+    def __init__(self, shm, future):
+        self._shm = shm
+        self._future = future
+
+    def __enter__(self):
+        try:
+            # Only the time waiting for the worker is spent here.
+            with phase('objgeo.wait'):
+                specs = self._future.result()
+            self._geometry = SharedObjGeoGeometry(view_arrays(self._shm.buf, specs))
+            return self._geometry
+        except BaseException:
+            self.release()
+            raise
+
+    # The views are dropped before the shared memory is closed, including the ones
+    # left in the frames of an exception.
+    def __exit__(self, exc_type, exc_value, tb):
+        self._geometry.__dict__.clear()
+        if tb:
+            traceback.clear_frames(tb)
+        self.release()
+
+    def cancel(self):
+        self._future.cancel()
+        self.release()
+
+    def release(self):
+        if not self._shm:
+            return
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+# The fields of ObjGeoGeometry as views of the shared memory, which SharedGeometry
+# removes on exit.
+class SharedObjGeoGeometry:
+    def __init__(self, arrays):
+        self.__dict__.update(zip(ObjGeoGeometry._fields, arrays))
+
+# It returns the (dtype, shape, offset) of each array written.
+def write_arrays(buf, arrays):
+    specs = []
+    o = 0
+    for x in arrays:
+        o = -(-o // ALIGN) * ALIGN
+        if o + x.nbytes > len(buf):
+            raise ParserError(f'Shared memory is too small: {o + x.nbytes} > {len(buf)}')
+        np.ndarray(x.shape, x.dtype, buf, o)[...] = x
+        specs.append((x.dtype.str, x.shape, o))
+        o += x.nbytes
+    return specs
+
+# Views hold an export of buf, so buf can't be closed under a live view.
+def view_arrays(buf, specs):
+    return [ np.frombuffer(buf, dtype, int(np.prod(shape)), o).reshape(shape) for dtype, shape, o in specs ]
+
+# Workers keep the last TMC open, since they decode many ObjGeo chunks of it. It's
+# (key, parser, mmaps), and closed when another TMC comes.
+_open_tmc = (None, None, ())
+
+def open_tmc(game, tmc_path, tmcl_path):
+    global _open_tmc
+    key, p, M = _open_tmc
+    if key == (game, tmc_path, tmcl_path):
+        return p
+    _open_tmc = (None, None, ())
+    if p:
+        p.close()
+    for m in M:
+        m.close()
+    with open(tmc_path, 'rb') as f, open(tmcl_path, 'rb') as g:
+        M = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), mmap.mmap(g.fileno(), 0, access=mmap.ACCESS_READ))
+    p = ((game == 'ngs1' and ngs1.TMCParser) or ngs2.TMCParser)(*M)
+    _open_tmc = ((game, tmc_path, tmcl_path), p, M)
+    return p
+
+def decode_objgeo_into(shm_name, game, tmc_path, tmcl_path, objgeo_index):
+    g = decode_objgeo(open_tmc(game, tmc_path, tmcl_path), objgeo_index, game == 'ngs2')
+    shm = SharedMemory(shm_name)
+    try:
+        return write_arrays(shm.buf, g)
+    finally:
+        shm.close()
@@ -0,0 +1,40 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+import numpy as np
+
+# Influences are given as three parallel arrays of vertex indices, vertex group
+# indices and weights.
+
+# NGS2 stores four UBYTE4 pairs of blend indices and weights per vertex. The weights
+# are normalized by 0xff, and pairs after the point where they sum up to 0xff are
+# unused.
+def ubyte4_influences(blend_indices, blend_weights, first_vertex = 0):
+    C = np.cumsum(blend_weights, axis=1, dtype=np.int32)
+    unused = np.zeros(C.shape, bool)
+    unused[:, 1:] = np.logical_or.accumulate(C[:, :-1] == 0xff, axis=1)
+    V, J = np.nonzero(~unused)
+    return (V + first_vertex).astype(np.int32), blend_indices[V, J].astype(np.int32), \
+           blend_weights[V, J] * np.float32(1/0xff)
+
+# NGS1 stores two FLOAT2 weights per vertex, which belong to the first two groups.
+def float2_influences(blend_weights, first_vertex = 0):
+    n = len(blend_weights)
+    return np.repeat(np.arange(first_vertex, first_vertex+n, dtype=np.int32), 2), \
+           np.tile(np.array((0, 1), np.int32), n), \
+           np.ascontiguousarray(blend_weights, np.float32).ravel()
+
+# It yields (group, weight, vertices) so that each group receives all vertices of
+# the same weight at once. As with assigning them one by one, a later influence
+# on the same vertex and group replaces an earlier one.
+def group_influences(vertices, groups, weights):
+    if not len(vertices):
+        return
+    K = vertices.astype(np.int64) * (int(groups.max()) + 1) + groups
+    _, I = np.unique(K[::-1], return_index=True)
+    I = len(K) - 1 - I
+    V, G, W = vertices[I], groups[I], weights[I]
+    I = np.lexsort((W, G))
+    V, G, W = V[I], G[I], W[I]
+    B = np.flatnonzero((G[1:] != G[:-1]) | (W[1:] != W[:-1])) + 1
+    yield from zip(G[np.r_[0, B]].tolist(), W[np.r_[0, B]].tolist(), np.split(V, B))
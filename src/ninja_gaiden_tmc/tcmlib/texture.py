@@ -0,0 +1,148 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+from .parser import ParserError
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import os
+import struct
+import numpy as np
+
+# Decoders below return RGBA pixels as a float32 array of shape (height, width, 4),
+# whose first row is the top of the image. NumPy releases the GIL in most of the
+# work, so textures can be decoded in parallel with decode_dds_images.
+
+def decode_argb8888(data, width, height):
+    # A8R8G8B8 is stored as BGRA bytes.
+    X = np.frombuffer(data, np.uint8, count=4*width*height).reshape(height, width, 4)
+    return X[..., [2, 1, 0, 3]] * np.float32(1/0xff)
+
+def decode_abgr8888(data, width, height):
+    X = np.frombuffer(data, np.uint8, count=4*width*height).reshape(height, width, 4)
+    return X * np.float32(1/0xff)
+
+def decode_dxt1(data, width, height):
+    B = _view_blocks(data, width, height, 8)
+    P = _color_palettes(B[:, 0:4], True)
+    I = _block_indices(B[:, 4:8], 2)
+    return _untile(_lookup(P, I), width, height)
+
+def decode_dxt3(data, width, height):
+    B = _view_blocks(data, width, height, 16)
+    P = _color_palettes(B[:, 8:12], False)
+    I = _block_indices(B[:, 12:16], 2)
+    X = _lookup(P, I)
+    # Each texel has an explicit 4 bit alpha.
+    A = np.stack((B[:, 0:8] & 0xf, B[:, 0:8] >> 4), axis=-1).reshape(-1, 16)
+    X[..., 3] = A * np.float32(1/0xf)
+    return _untile(X, width, height)
+
+def decode_dxt5(data, width, height):
+    B = _view_blocks(data, width, height, 16)
+    P = _color_palettes(B[:, 8:12], False)
+    I = _block_indices(B[:, 12:16], 2)
+    X = _lookup(P, I)
+    A = _alpha_palettes(B[:, 0:2])
+    I = _block_indices(B[:, 2:8], 3)
+    X[..., 3] = _lookup(A, I)
+    return _untile(X, width, height)
+
+def _view_blocks(data, width, height, block_nbytes):
+    n = ((width+3)//4) * ((height+3)//4)
+    try:
+        return np.frombuffer(data, np.uint8, count=n*block_nbytes).reshape(n, block_nbytes)
+    except ValueError:
+        raise ParserError(f'Texture data is too small for {width}x{height}') from None
+
+def _rgb565(c):
+    c = c.astype(np.uint32)
+    return np.stack(((c >> 11 & 0x1f) * np.float32(1/0x1f),
+                     (c >> 5 & 0x3f) * np.float32(1/0x3f),
+                     (c & 0x1f) * np.float32(1/0x1f)), axis=-1)
+
+def _color_palettes(B, has_punchthrough):
+    C = B.copy().view('<u2')
+    c0, c1 = C[:, 0], C[:, 1]
+    p0, p1 = _rgb565(c0), _rgb565(c1)
+    P = np.ones((len(B), 4, 4), np.float32)
+    P[:, 0, :3] = p0
+    P[:, 1, :3] = p1
+    P[:, 2, :3] = (2*p0 + p1) / 3
+    P[:, 3, :3] = (p0 + 2*p1) / 3
+    if has_punchthrough:
+        # DXT1 blocks with c0 <= c1 have the midpoint and transparent black instead.
+        J = c0 <= c1
+        P[J, 2, :3] = (p0[J] + p1[J]) / 2
+        P[J, 3] = 0
+    return P
+
+def _alpha_palettes(B):
+    a0, a1 = B[:, 0].astype(np.float32), B[:, 1].astype(np.float32)
+    W = np.arange(1, 7, dtype=np.float32)
+    A = np.empty((len(B), 8), np.float32)
+    A[:, 0], A[:, 1] = a0, a1
+    A[:, 2:8] = ((7-W)*a0[:, None] + W*a1[:, None]) / 7
+    # Blocks with a0 <= a1 have 4 interpolated values, 0 and 0xff.
+    J = a0 <= a1
+    W = np.arange(1, 5, dtype=np.float32)
+    A[J, 2:6] = ((5-W)*a0[J, None] + W*a1[J, None]) / 5
+    A[J, 6], A[J, 7] = 0, 0xff
+    return A * np.float32(1/0xff)
+
+# It unpacks the little-endian bit field of 16 texel indices of bits bits each.
+def _block_indices(B, bits):
+    x = np.zeros(len(B), np.uint64)
+    for i in range(B.shape[1]):
+        x |= B[:, i].astype(np.uint64) << np.uint64(8*i)
+    S = np.arange(0, 16*bits, bits, dtype=np.uint64)
+    return (x[:, None] >> S & np.uint64((1 << bits) - 1)).astype(np.intp)
+
+# It looks up the palette of each block by the indices of its texels.
+def _lookup(P, I):
+    n, m = P.shape[:2]
+    I += m * np.arange(n)[:, None]
+    return P.reshape(n*m, *P.shape[2:])[I]
+
+def _untile(X, width, height):
+    bw, bh = (width+3)//4, (height+3)//4
+    X = X.reshape(bh, bw, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(4*bh, 4*bw, 4)
+    return X[:height, :width]
+
+# Decoders by FourCC of DDS
+FOURCC_DECODERS = {
+        b'DXT1': decode_dxt1,
+        b'DXT3': decode_dxt3,
+        b'DXT5': decode_dxt5,
+}
+
+# It decodes the top level image of a DDS file, and returns None if the format is
+# not supported.
+def decode_dds(data):
+    data = memoryview(data)
+    if data[:4] != b'DDS ':
+        raise ParserError('No magic bytes "DDS " found')
+    height, width = struct.unpack_from('< II', data, 12)
+    pf_flags, four_cc, bit_count, rmask = struct.unpack_from('< I4sII', data, 80)
+    data = data[128:]
+    if pf_flags & 0x4:
+        f = FOURCC_DECODERS.get(four_cc)
+    elif pf_flags & 0x40 and bit_count == 32:
+        f = (rmask == 0xff and decode_abgr8888) or decode_argb8888
+    else:
+        f = None
+    return f and f(data, width, height)
+
+# It yields the decoded images of D in order. Only up to twice as many textures as
+# workers are decoded ahead of the consumer, so a large texture set doesn't hold
+# all its pixels at once.
+def decode_dds_images(D, max_workers = None):
+    max_workers = max_workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers) as executor:
+        F = deque()
+        for d in D:
+            F.append(executor.submit(decode_dds, d))
+            if len(F) > 2*max_workers:
+                yield F.popleft().result()
+        while F:
+            yield F.popleft().result()
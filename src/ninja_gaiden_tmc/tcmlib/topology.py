@@ -0,0 +1,52 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+from .parser import ParserError
+
+import numpy as np
+
+# Index size of an index buffer s is depends on the number of elements in the corresponding
+# vertex buffer N, i.e., if N < 1<<16 then s is 2 bytes, otherwise it's 4 bytes.
+def view_indices(data, vertex_count):
+    return np.frombuffer(data, (vertex_count < 1<<16 and '<u2') or '<u4')
+
+# NGS2 draws triangle strips, in which every other triangle has reversed winding.
+def strip_to_triangles(indices):
+    n = max(len(indices) - 2, 0)
+    T = np.column_stack((indices[:n], indices[1:n+1], indices[2:n+2]))
+    T[1::2] = T[1::2, ::-1]
+    return T
+
+# NGS1 draws triangle lists. A trailing incomplete triangle is ignored.
+def list_to_triangles(indices):
+    n = len(indices) // 3
+    return np.asarray(indices[:3*n]).reshape(n, 3)
+
+# It returns the indices of the triangles to keep in their original order. We drop
+# degenerate triangles and triangles whose vertices are the same as an earlier
+# one's regardless of winding, like bmesh does.
+def unique_triangles(triangles):
+    S = np.sort(triangles, axis=1)
+    I, = np.nonzero((S[:, 0] != S[:, 1]) & (S[:, 1] != S[:, 2]))
+    S = S[I].astype(np.int64)
+    # We pack each triangle into a single key, which is much faster to sort than rows.
+    if not S.size or S[:, 2].max() < 1<<21:
+        K = S[:, 0] << 42 | S[:, 1] << 21 | S[:, 2]
+    else:
+        K = np.ascontiguousarray(S).view(np.dtype((np.void, 24))).ravel()
+    _, J = np.unique(K, return_index=True)
+    J.sort()
+    return I[J]
+
+# spans is a sequence of (first_index_index, index_count) of ObjGeo chunks which
+# share one index buffer. It returns the triangles of all spans in vertex indices,
+# and the position in spans of the span each triangle comes from.
+def triangulate(indices, spans, vertex_count, strip):
+    f = (strip and strip_to_triangles) or list_to_triangles
+    X = [ f(indices[o:o+n]) for o, n in spans ]
+    T = np.concatenate([np.empty((0, 3), indices.dtype), *X]).astype(np.int32)
+    S = np.repeat(np.arange(len(X), dtype=np.int32), [ len(x) for x in X ])
+    if T.size and T.max() >= vertex_count:
+        raise ParserError(f'Index out of range: {T.max()} >= {vertex_count}')
+    I = unique_triangles(T)
+    return T[I], S[I]
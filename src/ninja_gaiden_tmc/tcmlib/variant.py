@@ -0,0 +1,21 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+# A color variant gives MtrCol chunks which replace the ones with the same index.
+# changes is a sequence of (mtrcol_chunk_index, MtrColChunk) of a variant, and it
+# returns a dict of the index to the chunk, only for chunks whose parameters differ
+# from the base ones. A later change of the same index replaces an earlier one.
+def diff_variant(mtrcol_chunks, changes):
+    base = { c.mtrcol_chunk_index: c for c in mtrcol_chunks }
+    D = {}
+    for i, c in changes:
+        try:
+            b = base[i]
+        except KeyError:
+            continue
+        # We compare everything but mtrcol_chunk_index and xrefs.
+        if c[:-2] != b[:-2]:
+            D[i] = c
+        else:
+            D.pop(i, None)
+    return D
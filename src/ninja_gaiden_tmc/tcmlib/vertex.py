@@ -0,0 +1,118 @@
+# Ninja Gaiden Model Importer for Blender by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of Ninja Gaiden Model Importer.
+
+from __future__ import annotations
+
+from .parser import ParserError
+from .ngs2.parser import D3DDECLTYPE, D3DDECLUSAGE
+
+from typing import NamedTuple
+from functools import lru_cache
+import numpy as np
+
+# (base type, component count) of each D3DDECLTYPE
+D3DDECLTYPE_FORMATS = {
+        D3DDECLTYPE.FLOAT1:    ('<f4', 1),
+        D3DDECLTYPE.FLOAT2:    ('<f4', 2),
+        D3DDECLTYPE.FLOAT3:    ('<f4', 3),
+        D3DDECLTYPE.FLOAT4:    ('<f4', 4),
+        D3DDECLTYPE.D3DCOLOR:  ('u1', 4),
+        D3DDECLTYPE.UBYTE4:    ('u1', 4),
+        D3DDECLTYPE.SHORT2:    ('<i2', 2),
+        D3DDECLTYPE.SHORT4:    ('<i2', 4),
+        D3DDECLTYPE.UBYTE4N:   ('u1', 4),
+        D3DDECLTYPE.SHORT2N:   ('<i2', 2),
+        D3DDECLTYPE.SHORT4N:   ('<i2', 4),
+        D3DDECLTYPE.USHORT2N:  ('<u2', 2),
+        D3DDECLTYPE.USHORT4N:  ('<u2', 4),
+        D3DDECLTYPE.UDEC3:     ('<u4', 1),
+        D3DDECLTYPE.DEC3N:     ('<u4', 1),
+        D3DDECLTYPE.FLOAT16_2: ('<f2', 2),
+        D3DDECLTYPE.FLOAT16_4: ('<f2', 4),
+}
+
+# The games store some elements in a type other than the declared one.
+GAME_DECL_TYPES = {
+        # They are not "short", but actually "float16".
+        (D3DDECLUSAGE.TEXCOORD, D3DDECLTYPE.USHORT2N): D3DDECLTYPE.FLOAT16_4,
+        (D3DDECLUSAGE.TEXCOORD, D3DDECLTYPE.SHORT4N): D3DDECLTYPE.FLOAT16_2,
+        # The type is not actually UDEC3, but UBYTE4.
+        (D3DDECLUSAGE.BLENDWEIGHT, D3DDECLTYPE.UDEC3): D3DDECLTYPE.UBYTE4,
+}
+
+class VertexLayout(NamedTuple):
+    dtype: np.dtype
+    # Each tuple has (field name, D3DDECLTYPE of the field after reinterpretation)
+    fields: tuple[tuple[str, D3DDECLTYPE]]
+
+# We compile D3DVERTEXELEMENT9s into a structured dtype whose fields are named
+# after their usage and usage index, e.g. "texcoord1". Many GeoDecl chunks share
+# a declaration, so the layouts are cached.
+@lru_cache(maxsize=None)
+def compile_vertex_layout(vertex_elements, vertex_nbytes, game_types = True):
+    names, formats, offsets, fields = [], [], [], []
+    for e in vertex_elements:
+        t = D3DDECLTYPE(e.d3d_decl_type)
+        if t == D3DDECLTYPE.UNUSED:
+            continue
+        u = D3DDECLUSAGE(e.usage)
+        if game_types:
+            t = GAME_DECL_TYPES.get((u, t), t)
+        try:
+            base, count = D3DDECLTYPE_FORMATS[t]
+        except KeyError:
+            raise ParserError(f'Not supported vert decl type: {repr(t)}') from None
+        name = f'{u.name.lower()}{e.usage_index}'
+        names.append(name)
+        formats.append((base, (count,)))
+        offsets.append(e.offset)
+        fields.append((name, t))
+    try:
+        dtype = np.dtype({ 'names': names, 'formats': formats,
+                           'offsets': offsets, 'itemsize': vertex_nbytes })
+    except ValueError as e:
+        raise ParserError(f'Invalid vertex declaration: {e}') from None
+    return VertexLayout(dtype, tuple(fields))
+
+# The returned array is a read-only view of data, so nothing is copied.
+def view_vertices(data, geodecl_chunk, game_types = True):
+    c = geodecl_chunk
+    layout = compile_vertex_layout(c.vertex_elements, c.vertex_nbytes, game_types)
+    try:
+        return np.frombuffer(data, layout.dtype, count=c.vertex_count)
+    except ValueError as e:
+        raise ParserError(f'Vertex buffer is too small: {e}') from None
+
+# It returns a dict that maps field names to arrays of shape (vertex_count, n).
+# Normalized and float types are decoded into float32, and the others are left
+# as integers.
+def decode_vertices(data, geodecl_chunk, game_types = True):
+    c = geodecl_chunk
+    layout = compile_vertex_layout(c.vertex_elements, c.vertex_nbytes, game_types)
+    V = view_vertices(data, c, game_types)
+    return { name: decode_field(V[name], t) for name, t in layout.fields }
+
+def decode_field(x, t):
+    match t:
+        case (D3DDECLTYPE.FLOAT1 | D3DDECLTYPE.FLOAT2 | D3DDECLTYPE.FLOAT3 | D3DDECLTYPE.FLOAT4
+              | D3DDECLTYPE.FLOAT16_2 | D3DDECLTYPE.FLOAT16_4):
+            return x.astype(np.float32)
+        case D3DDECLTYPE.D3DCOLOR:
+            # D3DCOLOR is stored as BGRA.
+            return x[:, [2, 1, 0, 3]] * np.float32(1/0xff)
+        case D3DDECLTYPE.UBYTE4 | D3DDECLTYPE.SHORT2 | D3DDECLTYPE.SHORT4:
+            return x.copy()
+        case D3DDECLTYPE.UBYTE4N:
+            return x * np.float32(1/0xff)
+        case D3DDECLTYPE.SHORT2N | D3DDECLTYPE.SHORT4N:
+            return np.maximum(x * np.float32(1/0x7fff), -1)
+        case D3DDECLTYPE.USHORT2N | D3DDECLTYPE.USHORT4N:
+            return x * np.float32(1/0xffff)
+        case D3DDECLTYPE.UDEC3:
+            return (x >> np.array((0, 10, 20), np.uint32)) & 0x3ff
+        case D3DDECLTYPE.DEC3N:
+            y = ((x >> np.array((0, 10, 20), np.uint32)) & 0x3ff).astype(np.int16)
+            y[y > 0x1ff] -= 0x400
+            return np.maximum(y * np.float32(1/0x1ff), -1)
+        case _:
+            raise ParserError(f'Not supported vert decl type: {repr(t)}')
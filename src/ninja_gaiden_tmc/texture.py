@@ -0,0 +1,82 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+from .tcmlib.texture import decode_dds_images
+from .tcmlib.instrument import phase
+
+import bpy
+import numpy as np
+
+import hashlib
+
+# We hand the file data (e.g. DDS) to Blender as a packed file, and Blender decodes
+# it from memory. Nothing is written to or read back from a temporary file.
+def new_packed_image(name, data):
+    data = bytes(data)
+    with phase('textures.pack', bytes=len(data)):
+        image = bpy.data.images.new(name, 1, 1)
+        image.pack(data=data, data_len=len(data))
+    image.source = 'FILE'
+    image.filepath_raw = ''
+    image.colorspace_settings.is_data = True
+    return image
+
+# pixels is an RGBA array of shape (height, width, 4) whose first row is the top.
+def new_decoded_image(name, pixels):
+    height, width = pixels.shape[:2]
+    with phase('textures.pixels', pixels=width*height):
+        image = bpy.data.images.new(name, width, height, alpha=True)
+        image.colorspace_settings.is_data = True
+        # Blender stores the bottom row first.
+        image.pixels.foreach_set(np.ascontiguousarray(pixels[::-1], np.float32).ravel())
+        image.pack()
+    return image
+
+# Images are keyed by a hash of their file data, which is kept in the image, so
+# importing the same texture again reuses the image instead of packing it again.
+TEXTURE_HASH = 'tmc_texture_hash'
+
+def texture_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def find_images():
+    return { x[TEXTURE_HASH]: x for x in bpy.data.images if TEXTURE_HASH in x }
+
+def image_hash(images, i):
+    try:
+        return images[i][TEXTURE_HASH]
+    except IndexError:
+        return None
+
+# If decode is true, DDS data are decoded by tcmlib in a thread pool instead of
+# Blender's DDS loader. Formats tcmlib doesn't support are still left to Blender.
+# If reuse is true, images which have already been loaded are reused, and only
+# the others are decoded.
+def load_images(name, D, decode = False, reuse = True):
+    cache = (reuse and find_images()) or {}
+    images = []
+    # Hash → (data, indices of images) of images to be created
+    pending = {}
+    for d in D:
+        h = texture_hash(d)
+        x = cache.get(h)
+        if x is None and not decode:
+            x = cache[h] = new_packed_image(name, d)
+            x[TEXTURE_HASH] = h
+        elif x is None:
+            pending.setdefault(h, (d, []))[1].append(len(images))
+        images.append(x)
+
+    # Each image is created as soon as its pixels are decoded, and the pixels are
+    # released before more textures are decoded.
+    if pending:
+        H = tuple(pending)
+        with phase('textures.decode', textures=len(H)):
+            X = decode_dds_images( pending[h][0] for h in H )
+            for h, x in zip(H, X, strict=True):
+                d, I = pending.pop(h)
+                x = new_packed_image(name, d) if x is None else new_decoded_image(name, x)
+                x[TEXTURE_HASH] = h
+                for i in I:
+                    images[i] = x
+    return images
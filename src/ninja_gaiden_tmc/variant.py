@@ -0,0 +1,56 @@
+# NINJA GAIDEN Model Importer by Nozomi Miyamori is under the public domain
+# and also marked with CC0 1.0. This file is a part of NINJA GAIDEN Model Importer.
+
+# Color variants are kept in the armature object as a table of (variant, base material,
+# variant material), which has only the materials changed by each variant. Variant 0
+# is the base. Mesh objects of the armature can switch their material slots to any
+# variant, or be copied for a variant into a collection.
+VARIANT_TABLE = 'tmc_variant_materials'
+VARIANT_COUNT = 'tmc_variant_count'
+# Mesh objects copied for a variant have this property. It's not the Color Variant
+# property of objects, which any object may have once it's been set.
+VARIANT_OF_OBJECT = 'tmc_variant_of'
+
+# T is a sequence of (variant, base material, variant material).
+def set_variant_materials(armature_obj, variant_count, T):
+    armature_obj[VARIANT_COUNT] = variant_count
+    armature_obj[VARIANT_TABLE] = [ { 'variant': k, 'base': b, 'material': m } for k, b, m in T ]
+
+def get_variant_count(armature_obj):
+    return armature_obj.get(VARIANT_COUNT, 0)
+
+def variant_materials(armature_obj, variant):
+    T = armature_obj.get(VARIANT_TABLE, ())
+    to_base = { x['material']: x['base'] for x in T }
+    to_variant = { x['base']: x['material'] for x in T if x['variant'] == variant }
+    def f(m):
+        b = to_base.get(m, m)
+        return to_variant.get(b, b)
+    return f
+
+def base_mesh_objects(armature_obj):
+    return [ o for o in armature_obj.children if o.type == 'MESH' and VARIANT_OF_OBJECT not in o ]
+
+# Material slots are linked to objects, so only the slots are remapped and the object
+# count stays the same regardless of the number of variants.
+def set_color_variant(armature_obj, variant):
+    f = variant_materials(armature_obj, variant)
+    for o in base_mesh_objects(armature_obj):
+        for ms in o.material_slots:
+            ms.material = f(ms.material)
+
+def materialize_color_variant(armature_obj, variant, collection):
+    f = variant_materials(armature_obj, variant)
+    O = []
+    for mo in base_mesh_objects(armature_obj):
+        o = mo.copy()
+        o[VARIANT_OF_OBJECT] = variant
+        collection.objects.link(o)
+        o.parent = armature_obj
+        for ms in o.material_slots:
+            ms.material = f(ms.material)
+        O.append(o)
+    return O
+
+def update_color_variant(self, context):
+    set_color_variant(self, self.tmc_color_variant)